@@ -0,0 +1,276 @@
+"""
+agent 循环基准测试
+启动本地的 OpenAI 兼容桩服务(fake_llm.py)代替真实模型，用仓库中现有的 MCPClient 连接对应的 stdio 服务端，
+N 个并发用户重复提问，统计：
+- qps:                 每秒完成的问题数
+- p50/p95/p99_ms:      单个问题端到端的耗时分位数
+- llm_ms / mcp_ms:     平均每个问题等待 LLM 调用 / MCP 请求的时间(并发的调用按时间区间合并，不重复计算)
+- overhead_ms:         其余的客户端开销(消息组装、工具转换、排队租借会话等)
+
+场景:
+- mcp-client:     mcp-client/main.py 的 MCPClient + mcp-server/main.py
+- projects-stdio: mcp_projects/client_stdio.py 的 MCPClient + mcp-server/main.py
+                  (mcp_projects/server.py 默认使用 SSE，只有一个 plus_tool，这里沿用 mcp-server 的工具)
+- weather:        mcp_tool/weather_search_client.py 的 MCPClient + mcp_tool/weather_search_server.py，
+                  天气接口指向本地桩服务
+
+运行: python benchmarks/agent_loop.py --users 1,4,16 --queries 50 --latency 0.05 --output agent_loop.json
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from common import ROOT, free_port, print_table, serve_in_thread, wait_for_port, write_json
+from mcp_common.metrics import percentile
+
+# 每个场景：(客户端脚本, 服务端脚本, 问题)
+SCENARIOS = {
+    "mcp-client": ("mcp-client/main.py", "mcp-server/main.py", "查询 alice 的用户信息"),
+    "projects-stdio": ("mcp_projects/client_stdio.py", "mcp-server/main.py", "查询 alice 的用户信息"),
+    "weather": ("mcp_tool/weather_search_client.py", "mcp_tool/weather_search_server.py", "查询成都的天气"),
+}
+# 桩服务返回的工具调用，只有出现在请求 tools 中的条目才会使用
+SCRIPT = [
+    {"name": "custom_tool", "arguments": {"name": "alice"}},
+    {"name": "get_weather", "arguments": {"city": "chengdu"}},
+]
+
+# 当前问题的耗时区间 [(类别, 开始, 结束)]，工具调用并发执行时子任务复制上下文，记录到同一个列表
+spans: ContextVar[Optional[list]] = ContextVar("agent_loop_spans", default=None)
+
+
+def timed(kind: str, func):
+    """包装异步方法，把调用耗时记到当前问题上"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current = spans.get()
+            if current is not None:
+                current.append((kind, start, time.perf_counter()))
+
+    return wrapper
+
+
+def timed_stream(kind: str, func):
+    """包装异步生成器，耗时覆盖整个流"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            async for item in func(*args, **kwargs):
+                yield item
+        finally:
+            current = spans.get()
+            if current is not None:
+                current.append((kind, start, time.perf_counter()))
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def instrument():
+    """统计所有 LLM 调用和 MCP 请求的耗时，退出时恢复原来的方法"""
+    from mcp import ClientSession
+    from mcp_common.llm_gateway import LLMGateway
+
+    originals = (LLMGateway.chat, LLMGateway.stream_chat, ClientSession.send_request)
+    LLMGateway.chat = timed("llm", LLMGateway.chat)
+    LLMGateway.stream_chat = timed_stream("llm", LLMGateway.stream_chat)
+    # initialize、list_tools、call_tool、ping 等请求都经过 send_request
+    ClientSession.send_request = timed("mcp", ClientSession.send_request)
+    try:
+        yield
+    finally:
+        LLMGateway.chat, LLMGateway.stream_chat, ClientSession.send_request = originals
+
+
+def busy(records: list, kinds: set[str]) -> float:
+    """指定类别的耗时区间合并后的总时长"""
+    intervals = sorted((start, end) for kind, start, end in records if kind in kinds)
+    total = 0.0
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def load_module(name: str, path: str):
+    """按路径导入客户端脚本，几个脚本都叫 MCPClient，用不同的模块名区分"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.asynccontextmanager
+async def open_client(scenario: str, args, weather_url: str):
+    """创建并连接场景对应的客户端，返回处理单个问题的协程函数"""
+    client_path, server_path, _ = SCENARIOS[scenario]
+    server_path = os.path.join(ROOT, server_path)
+    module = load_module(f"agent_loop_{scenario.replace('-', '_')}", client_path)
+    if scenario == "mcp-client":
+        client = module.MCPClient(stream=args.stream, result_cache_size=args.tool_cache_size)
+        await client.connect_to_server(server_path)
+        try:
+            yield client.process_query_stream if args.stream else client.process_query
+        finally:
+            await client.cleanup()
+        return
+
+    client = module.MCPClient(server_path, pool_size=args.pool_size)
+    if scenario == "weather":
+        from mcp_common.session_pool import StdioSessionPool
+
+        # stdio 子进程默认不继承环境变量，需要显式把桩服务地址传给天气服务端
+        client.pool = StdioSessionPool(
+            server_path, size=args.pool_size, env={"WEATHER_BASE_URL": weather_url}
+        )
+    await client.pool.start()
+    try:
+        yield client.run
+    finally:
+        await client.aclose()
+
+
+async def drive(ask, query: str, users: int, total: int) -> dict:
+    """users 个并发用户一共提 total 个问题，返回吞吐、延迟和耗时拆分"""
+    remaining = total
+    results = []  # [(端到端耗时, LLM 耗时, MCP 耗时, 其他开销)]
+
+    async def user():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            records = []
+            spans.set(records)
+            start = time.perf_counter()
+            await ask(query)
+            elapsed = time.perf_counter() - start
+            results.append((
+                elapsed,
+                busy(records, {"llm"}),
+                busy(records, {"mcp"}),
+                elapsed - busy(records, {"llm", "mcp"}),
+            ))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    totals = [item[0] for item in results]
+    count = len(results)
+    return {
+        "queries": count,
+        "qps": round(count / elapsed, 2),
+        "p50_ms": round(percentile(totals, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(totals, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(totals, 0.99) * 1000, 1),
+        "llm_ms": round(sum(item[1] for item in results) / count * 1000, 1),
+        "mcp_ms": round(sum(item[2] for item in results) / count * 1000, 1),
+        "overhead_ms": round(sum(item[3] for item in results) / count * 1000, 1),
+    }
+
+
+async def main(args):
+    from weather_http_pool import stub_app
+
+    llm_port = free_port()
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_llm.py"),
+        "--port", str(llm_port),
+        "--latency", str(args.latency),
+        "--tps", str(args.tps),
+        "--rounds", str(args.rounds),
+        "--parallel", str(args.parallel),
+        "--script", json.dumps(SCRIPT, ensure_ascii=False),
+    ]
+    llm_process = subprocess.Popen(command)
+    weather_port = free_port()
+    weather_server = serve_in_thread(stub_app, weather_port)
+    # 必须在创建 LLM 网关之前设置
+    os.environ["BASE_URL"] = f"http://127.0.0.1:{llm_port}/v1"
+    os.environ["API_KEY"] = "fake"
+    os.environ["MODEL"] = "fake-llm"
+
+    rows = []
+    with instrument():
+        try:
+            wait_for_port(llm_port)
+            for scenario in args.scenarios:
+                query = SCENARIOS[scenario][2]
+                # 客户端会打印回复和工具列表，测试期间丢弃
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    async with open_client(scenario, args, f"http://127.0.0.1:{weather_port}/v1/current.json") as ask:
+                        # 预热：进程池、工具列表缓存
+                        await ask(query)
+                        results = []
+                        for users in args.users:
+                            results.append({"scenario": scenario, "users": users, **await drive(ask, query, users, args.queries)})
+                for row in results:
+                    print(row, flush=True)
+                rows.extend(results)
+        finally:
+            from mcp_common.llm_gateway import close_gateway
+
+            await close_gateway()
+            weather_server.should_exit = True
+            llm_process.terminate()
+            llm_process.wait()
+
+    print()
+    print_table(rows)
+    if args.output:
+        write_json(
+            args.output,
+            rows,
+            benchmark="agent_loop",
+            latency=args.latency,
+            tps=args.tps,
+            rounds=args.rounds,
+            parallel=args.parallel,
+            stream=args.stream,
+            tool_cache_size=args.tool_cache_size,
+        )
+
+
+def int_list(text: str) -> list[int]:
+    return [int(item) for item in text.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=lambda text: text.split(","), default=list(SCENARIOS))
+    parser.add_argument("--users", type=int_list, default=[1, 4, 16], help="并发用户数")
+    parser.add_argument("--queries", type=int, default=50, help="每组测试的问题数")
+    parser.add_argument("--latency", type=float, default=0.05, help="桩模型首个 token 之前的延迟(秒)")
+    parser.add_argument("--tps", type=float, default=0.0, help="桩模型每秒生成的 token 数，0 表示不模拟")
+    parser.add_argument("--rounds", type=int, default=1, help="每个问题的工具调用轮数")
+    parser.add_argument("--parallel", type=int, default=1, help="每轮的工具调用数")
+    parser.add_argument("--pool-size", type=int, default=4, help="使用进程池的客户端的会话数")
+    parser.add_argument("--stream", action="store_true", help="mcp-client 使用流式模式")
+    parser.add_argument(
+        "--tool-cache-size", type=int, default=0,
+        help="mcp-client 的工具结果缓存条数，默认 0 表示关闭；开启后重复的问题大多命中缓存，mcp_ms 不再反映 MCP 往返",
+    )
+    parser.add_argument("--output", help="结果写入的 JSON 文件路径")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+基准测试公用工具：后台启动 ASGI 桩服务、等待子进程服务就绪、统计延迟分位数、输出结果
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from mcp_common.metrics import percentile
+
+
+def free_port() -> int:
+    """获取一个本机空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    """等待子进程中的服务开始监听端口"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise TimeoutError(f"服务端口 {port} 没有启动")
+
+
+def serve_in_thread(asgi_app, port: int) -> uvicorn.Server:
+    """在后台线程运行 ASGI 应用，返回后可以直接发请求，用 server.should_exit = True 停止"""
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """把单次请求耗时(秒)汇总成吞吐量和毫秒级分位数"""
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def print_table(rows: list[dict]):
+    if not rows:
+        return
+    headers = list(rows[0])
+    widths = [max(len(str(h)), *(len(str(row[h])) for row in rows)) for h in headers]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(headers, widths)))
+
+
+def write_json(path: str, rows: list[dict], **meta):
+    """写出机器可读的结果，便于跟踪回归"""
+    with open(path, mode="w", encoding="utf-8") as fp:
+        json.dump({"timestamp": time.time(), **meta, "results": rows}, fp, ensure_ascii=False, indent=2)
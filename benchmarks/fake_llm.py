@@ -0,0 +1,197 @@
+"""
+本地 OpenAI 兼容的 chat.completions 桩服务
+按脚本返回 tool_calls，不消耗真实模型额度，可以配置延迟和 token 数，用于压测客户端的 agent 循环：
+- 请求带有 tools 且本轮用户消息之后的工具调用轮数少于 --rounds 时，返回 tool_calls，
+  工具和参数取自 --script 中第一个出现在请求 tools 里的条目，都不匹配时取请求中的第一个工具，
+  参数按 inputSchema 生成
+- 否则返回最终回复
+- 响应在 --latency 秒后开始返回，之后按 --tps(token/秒) 生成内容，支持 stream=True
+
+单独运行(客户端设置 BASE_URL=http://127.0.0.1:8001/v1、API_KEY 任意值):
+    python benchmarks/fake_llm.py --port 8001 --latency 0.3 --script '[{"name": "plus_tool", "arguments": {"a": 1, "b": 2}}]'
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from common import ROOT  # noqa: F401  把仓库根目录加入 sys.path
+from mcp_common.text_chunks import estimate_text_tokens
+
+FINAL_TEXT = "已根据工具结果完成回答。"
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: float = 0.0  # 首个 token 之前的延迟(秒)
+    tps: float = 0.0  # 每秒生成的 token 数，0 表示立即生成完
+    completion_tokens: int = 20  # 最终回复的 token 数
+    rounds: int = 1  # 每个用户问题返回几轮 tool_calls
+    parallel: int = 1  # 每轮返回的工具调用数
+    script: list[dict] = field(default_factory=list)  # [{"name": 工具名, "arguments": 参数}]
+
+
+def sample_value(schema: dict):
+    """按 JSON Schema 生成一个示例值"""
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.5
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return [sample_value(schema.get("items", {"type": "string"}))]
+    if kind == "object":
+        return sample_arguments(schema)
+    return "chengdu"
+
+
+def sample_arguments(schema: dict) -> dict:
+    properties = schema.get("properties", {})
+    return {name: sample_value(properties.get(name, {})) for name in schema.get("required", [])}
+
+
+def plan_calls(config: FakeLLMConfig, tools: list[dict]) -> list[dict]:
+    """挑选本轮要调用的工具：优先脚本中出现在请求里的工具，否则用第一个工具并按 schema 生成参数"""
+    functions = {tool["function"]["name"]: tool["function"] for tool in tools}
+    planned = [item for item in config.script if item["name"] in functions]
+    if not planned:
+        function = next(iter(functions.values()))
+        planned = [{"name": function["name"], "arguments": sample_arguments(function.get("parameters") or {})}]
+    calls = []
+    for index in range(config.parallel):
+        item = planned[index % len(planned)]
+        calls.append({
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": item["name"], "arguments": json.dumps(item["arguments"], ensure_ascii=False)},
+        })
+    return calls
+
+
+def tool_rounds(messages: list[dict]) -> int:
+    """最后一条用户消息之后，助手已经发起过几轮工具调用"""
+    rounds = 0
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            break
+        if message.get("role") == "assistant" and message.get("tool_calls"):
+            rounds += 1
+    return rounds
+
+
+def create_app(config: FakeLLMConfig) -> Starlette:
+    async def completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        tools = body.get("tools") or []
+        if tools and tool_rounds(messages) < config.rounds:
+            calls = plan_calls(config, tools)
+            content = None
+            finish_reason = "tool_calls"
+            completion_tokens = sum(estimate_text_tokens(call["function"]["arguments"]) + 5 for call in calls)
+        else:
+            calls = []
+            content = FINAL_TEXT
+            finish_reason = "stop"
+            completion_tokens = config.completion_tokens
+        usage = {
+            "prompt_tokens": estimate_text_tokens(json.dumps([messages, tools], ensure_ascii=False)),
+            "completion_tokens": completion_tokens,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model") or "fake-llm"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        # 每个 token 的生成耗时
+        token_delay = 1 / config.tps if config.tps > 0 else 0.0
+
+        await asyncio.sleep(config.latency)
+        if not body.get("stream"):
+            await asyncio.sleep(token_delay * completion_tokens)
+            message = {"role": "assistant", "content": content}
+            if calls:
+                message["tool_calls"] = calls
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        def chunk(delta: dict, finish: str | None = None, chunk_usage: dict | None = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            if calls:
+                for index, call in enumerate(calls):
+                    await asyncio.sleep(token_delay * estimate_text_tokens(call["function"]["arguments"]))
+                    yield chunk({"tool_calls": [{"index": index, **call}]})
+            else:
+                for _ in range(completion_tokens):
+                    await asyncio.sleep(token_delay)
+                    yield chunk({"content": "好"})
+            yield chunk({}, finish_reason)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+def load_script(text: str | None) -> list[dict]:
+    """--script 可以是 JSON 文件路径，也可以直接是 JSON 数组"""
+    if not text:
+        return []
+    if os.path.exists(text):
+        with open(text, encoding="utf-8") as fp:
+            return json.load(fp)
+    return json.loads(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="首个 token 之前的延迟(秒)")
+    parser.add_argument("--tps", type=float, default=0.0, help="每秒生成的 token 数，0 表示不模拟生成耗时")
+    parser.add_argument("--completion-tokens", type=int, default=20, help="最终回复的 token 数")
+    parser.add_argument("--rounds", type=int, default=1, help="每个问题返回几轮 tool_calls")
+    parser.add_argument("--parallel", type=int, default=1, help="每轮返回的工具调用数")
+    parser.add_argument("--script", help="工具调用脚本：JSON 文件路径或 JSON 数组")
+    args = parser.parse_args()
+    config = FakeLLMConfig(
+        latency=args.latency,
+        tps=args.tps,
+        completion_tokens=args.completion_tokens,
+        rounds=args.rounds,
+        parallel=args.parallel,
+        script=load_script(args.script),
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,109 @@
+"""
+列表接口分页基准测试
+构造一个包含 N 个工具/资源/提示词的 FastMCP 服务(默认各 10000 个)，通过 SSE 分别以
+不分页(FastMCP 默认，一次返回全部)和游标分页两种方式提供，对比：
+- first_ms:  拿到第一页(第一批条目)的耗时，决定客户端多快可以开始处理
+- total_ms:  逐页拉完全部条目的耗时
+- max_page_kb: 单个响应的最大体积，决定两端单次请求的内存峰值
+
+运行: python benchmarks/pagination.py --entries 10000 --page-size 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.prompts import Prompt
+from mcp.server.fastmcp.resources import TextResource
+
+from common import free_port, print_table, serve_in_thread, write_json
+from mcp_common.pagination import enable_pagination, iter_pages
+
+KINDS = {
+    "tools": ("list_tools", "tools"),
+    "resources": ("list_resources", "resources"),
+    "prompts": ("list_prompts", "prompts"),
+}
+
+
+def tool(a: int, b: int) -> int:
+    """示例工具"""
+    return a + b
+
+
+def prompt(topic: str) -> str:
+    """示例提示词"""
+    return f"请介绍 {topic}"
+
+
+def build_app(entries: int, page_size: int | None) -> FastMCP:
+    app = FastMCP(log_level="WARNING")
+    for index in range(entries):
+        app.add_tool(tool, name=f"tool_{index}", description=f"示例工具 {index}")
+        app.add_resource(TextResource(
+            uri=f"memo://user/{index}", name=f"user_{index}", text=str(index), mime_type="text/plain"
+        ))
+        app.add_prompt(Prompt.from_function(prompt, name=f"prompt_{index}"))
+    if page_size is not None:
+        enable_pagination(app, page_size=page_size)
+    return app
+
+
+async def measure(url: str, kind: str) -> dict:
+    method, field = KINDS[kind]
+    async with sse_client(url) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            fetch = getattr(session, method)
+            pages = 0
+            items = 0
+            max_page = 0
+            first = None
+            start = time.perf_counter()
+
+            async def sized_fetch(params=None):
+                nonlocal max_page
+                result = await fetch(params=params)
+                max_page = max(max_page, len(json.dumps(result.model_dump(mode="json", exclude_none=True))))
+                return result
+
+            async for page in iter_pages(sized_fetch, lambda result: getattr(result, field)):
+                if first is None:
+                    first = time.perf_counter() - start
+                pages += 1
+                items += len(page)
+            total = time.perf_counter() - start
+    return {
+        "items": items,
+        "pages": pages,
+        "first_ms": round(first * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+        "max_page_kb": round(max_page / 1024, 1),
+    }
+
+
+async def main(args):
+    rows = []
+    servers = []
+    for mode, page_size in (("full", None), (f"paged({args.page_size})", args.page_size)):
+        port = free_port()
+        servers.append(serve_in_thread(build_app(args.entries, page_size).sse_app(), port))
+        for kind in KINDS:
+            rows.append({"kind": kind, "mode": mode, **await measure(f"http://127.0.0.1:{port}/sse", kind)})
+    for server in servers:
+        server.should_exit = True
+
+    print_table(rows)
+    if args.output:
+        write_json(args.output, rows, benchmark="pagination", entries=args.entries, page_size=args.page_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--output", help="结果写入的 JSON 文件路径")
+    asyncio.run(main(parser.parse_args()))
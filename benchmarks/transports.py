@@ -0,0 +1,161 @@
+"""
+传输方式基准测试：stdio / SSE / Streamable HTTP
+以子进程启动 mcp_projects/server.py 的服务(额外注册一个 echo 工具用于传输不同大小的负载)，
+客户端在一个会话上以不同并发数调用工具，统计每种传输方式的：
+- rps:        每秒完成的工具调用数
+- mb_s:       每秒往返传输的负载(MB)
+- p50/p95/p99_ms: 单次调用的延迟分位数
+
+plus_tool 对应最小的请求，echo 按 --payloads 指定的字节数发送并原样返回；
+每组测试的请求数不超过 --requests，也不超过 --max-mb 的总负载，避免大负载跑太久
+
+运行: python benchmarks/transports.py --concurrency 1,8,32 --payloads 1,1024,1048576,10485760 --output transports.json
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from common import free_port, print_table, summarize, wait_for_port, write_json
+
+TRANSPORTS = ["stdio", "sse", "streamable-http"]
+MB = 1024 * 1024
+
+
+def serve(transport: str, port: int, max_body: int):
+    """子进程中运行：启动被测服务"""
+    from mcp_projects.server import app
+
+    @app.tool(structured_output=False)
+    def echo(payload: str) -> str:
+        """原样返回负载"""
+        return payload
+
+    app.settings.host = "127.0.0.1"
+    app.settings.port = port
+    # 服务端在创建时已按 INFO 配置日志，逐条请求的日志会影响测量结果
+    logging.getLogger().setLevel(logging.WARNING)
+    app.settings.log_level = "WARNING"
+    # SDK 默认拒绝超过 4 MiB 的 HTTP 请求体(413)，放宽到能容纳最大的测试负载
+    app.settings.max_request_body_size = max_body
+    app.run(transport=transport)
+
+
+@asynccontextmanager
+async def connect(transport: str, payloads: str):
+    """启动服务子进程并建立一个已初始化的客户端会话"""
+    command = [sys.executable, os.path.abspath(__file__), "--serve", transport, "--payloads", payloads]
+    if transport == "stdio":
+        params = StdioServerParameters(command=command[0], args=command[1:])
+        async with stdio_client(params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+        return
+
+    port = free_port()
+    process = subprocess.Popen(command + ["--port", str(port)])
+    try:
+        wait_for_port(port)
+        if transport == "sse":
+            client = sse_client(f"http://127.0.0.1:{port}/sse")
+        else:
+            client = streamablehttp_client(f"http://127.0.0.1:{port}/mcp")
+        async with client as (read_stream, write_stream, *_):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def drive(
+    session: ClientSession, tool: str, size: int, total: int, concurrency: int, timeout: float
+) -> dict:
+    """以固定并发调用 total 次工具，返回吞吐和延迟"""
+    arguments = {"a": 1, "b": 0.00001} if tool == "plus_tool" else {"payload": "x" * size}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments, read_timeout_seconds=timedelta(seconds=timeout))
+            latencies.append(time.perf_counter() - start)
+            if result.isError:
+                raise RuntimeError(result.content[0].text)
+
+    # 预热：建立连接、填充服务端的缓存
+    await one()
+    latencies.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    # 请求和响应各携带一份负载
+    return {**summarize(latencies, elapsed), "mb_s": round(2 * size * total / MB / elapsed, 2)}
+
+
+async def main(args):
+    cases = [("plus_tool", 0)] + [("echo", size) for size in args.payloads]
+    rows = []
+    for transport in args.transports:
+        async with connect(transport, ",".join(map(str, args.payloads))) as session:
+            for tool, size in cases:
+                total = args.requests
+                if size:
+                    total = max(args.min_requests, min(total, args.max_mb * MB // size))
+                for concurrency in args.concurrency:
+                    row = {"transport": transport, "tool": tool, "payload": size, "concurrency": concurrency}
+                    try:
+                        row.update(await drive(session, tool, size, total, concurrency, args.call_timeout))
+                    except Exception as e:
+                        row["error"] = str(e) or type(e).__name__
+                    rows.append(row)
+                    print(row, flush=True)
+
+    print()
+    # 失败的组没有统计数据，补齐列后再打印
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    print_table([{key: row.get(key, "") for key in columns} for row in rows])
+    if args.output:
+        write_json(
+            args.output,
+            rows,
+            benchmark="transports",
+            requests=args.requests,
+            max_mb=args.max_mb,
+        )
+
+
+def int_list(text: str) -> list[int]:
+    return [int(item) for item in text.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transports", type=lambda text: text.split(","), default=TRANSPORTS)
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32])
+    parser.add_argument("--payloads", type=int_list, default=[1, 1024, MB, 10 * MB], help="echo 负载字节数")
+    parser.add_argument("--requests", type=int, default=500, help="每组测试的请求数上限")
+    parser.add_argument("--min-requests", type=int, default=10, help="大负载时每组测试的最少请求数")
+    parser.add_argument("--max-mb", type=int, default=200, help="每组测试单向传输的负载总量上限(MB)")
+    parser.add_argument("--call-timeout", type=float, default=120.0, help="单次调用的超时时间(秒)")
+    parser.add_argument("--output", help="结果写入的 JSON 文件路径")
+    parser.add_argument("--serve", choices=TRANSPORTS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port, max(args.payloads) * 2 + MB)
+    else:
+        asyncio.run(main(args))
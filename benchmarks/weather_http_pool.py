@@ -0,0 +1,82 @@
+"""
+get_weather 连接复用基准测试
+在本地启动一个天气接口桩服务，对比两种 httpx 客户端用法的 requests/s：
+- per-call: 每次调用新建 httpx.AsyncClient（改造前 get_weather 的做法）
+- pooled:   lifespan 中创建的共享连接池（改造后的做法）
+
+运行: python benchmarks/weather_http_pool.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from common import free_port, print_table, serve_in_thread, summarize, write_json
+
+STUB_RESPONSE = {
+    "location": {"name": "Chengdu", "country": "China"},
+    "current": {"temp_c": 26.0, "condition": {"text": "Sunny"}, "humidity": 60},
+}
+
+
+async def current(request):
+    return JSONResponse({**STUB_RESPONSE, "q": request.query_params.get("q")})
+
+
+stub_app = Starlette(routes=[Route("/v1/current.json", current)])
+
+
+async def drive(call, total: int, concurrency: int) -> dict:
+    """以固定并发执行 total 次 call，返回吞吐和延迟"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await call(f"city{index % 20}")
+            latencies.append(time.perf_counter() - start)
+            assert "error" not in result, result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def main(args):
+    port = free_port()
+    server = serve_in_thread(stub_app, port)
+    # 必须在导入服务端模块之前设置，让 get_weather 请求本地桩服务
+    os.environ["WEATHER_BASE_URL"] = f"http://127.0.0.1:{port}/v1/current.json"
+    from mcp_tool import weather_search_server as weather
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async def per_call(city: str) -> dict:
+        async with weather.create_http_client() as client:
+            return await weather.fetch_weather(client, city)
+
+    rows = [{"mode": "per-call", **await drive(per_call, args.requests, args.concurrency)}]
+
+    async with weather.app_lifespan(weather.app) as state:
+        async def pooled(city: str) -> dict:
+            return await weather.fetch_weather(state.http_client, city)
+
+        rows.append({"mode": "pooled", **await drive(pooled, args.requests, args.concurrency)})
+
+    server.should_exit = True
+    print_table(rows)
+    if args.output:
+        write_json(args.output, rows, benchmark="weather_http_pool", concurrency=args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", help="结果写入的 JSON 文件路径")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+"""
+多 worker 扩展基准测试
+以不同的 worker 数启动 mcp_projects/server.py(通过 MCP_TRANSPORT / MCP_WORKERS / MCP_STATELESS 配置)，
+多个压测进程各自建立若干会话，在 --duration 秒内不停调用 plus_tool，对比：
+- sse:                 单进程 SSE(改造前的部署方式)
+- stateless:           无状态 Streamable HTTP，worker 共享监听端口
+- stateful:            有状态 Streamable HTTP，多个 worker 时经过会话亲和代理
+统计 rps、延迟分位数，以及相对同一模式单 worker 的加速比(speedup)
+worker 数超过 CPU 核数后吞吐不会继续增长，压测进程本身也会占用 CPU
+
+运行: python benchmarks/workers.py --workers 1,2,4 --sessions 32 --duration 10 --output workers.json
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from common import ROOT, free_port, print_table, summarize, wait_for_port, write_json
+
+SERVER = os.path.join(ROOT, "mcp_projects", "server.py")
+
+
+async def load(url: str, transport: str, sessions: int, duration: float) -> list[float]:
+    """建立 sessions 个会话，每个会话串行调用工具直到时间结束，返回每次调用的耗时"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def one_session():
+        client = sse_client(url) if transport == "sse" else streamablehttp_client(url)
+        async with client as (read_stream, write_stream, *_):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    result = await session.call_tool("plus_tool", {"a": 1, "b": 0.00001})
+                    latencies.append(time.perf_counter() - start)
+                    if result.isError:
+                        raise RuntimeError(result.content[0].text)
+
+    await asyncio.gather(*(one_session() for _ in range(sessions)))
+    return latencies
+
+
+def load_process(args: tuple) -> list[float]:
+    return asyncio.run(load(*args))
+
+
+def measure(mode: str, workers: int, args) -> dict:
+    port = free_port()
+    transport = "sse" if mode == "sse" else "streamable-http"
+    env = {
+        **os.environ,
+        "MCP_TRANSPORT": transport,
+        "MCP_PORT": str(port),
+        "MCP_WORKERS": str(workers),
+        "MCP_STATELESS": "1" if mode == "stateless" else "0",
+    }
+    server = subprocess.Popen([sys.executable, SERVER], env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/sse" if mode == "sse" else f"http://127.0.0.1:{port}/mcp"
+        # 会话平均分给各压测进程，避免客户端成为瓶颈
+        shares = [args.sessions // args.clients + (index < args.sessions % args.clients) for index in range(args.clients)]
+        jobs = [(url, transport, share, args.duration) for share in shares if share]
+        with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+            results = pool.map(load_process, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = [latency for result in results for latency in result]
+    # 按压测时长计算吞吐，不计入压测进程启动和建立会话的时间
+    return {"mode": mode, "workers": workers, **summarize(latencies, args.duration)}
+
+
+def main(args):
+    rows = []
+    for mode in args.modes:
+        # SSE 的会话绑定在单个进程上，只测一个 worker
+        for workers in [1] if mode == "sse" else args.workers:
+            row = measure(mode, workers, args)
+            baseline = next((item for item in rows if item["mode"] == mode and item["workers"] == 1), None)
+            row["speedup"] = round(row["rps"] / baseline["rps"], 2) if baseline and baseline["rps"] else 1.0
+            rows.append(row)
+            print(row, flush=True)
+
+    print()
+    print_table(rows)
+    if args.output:
+        write_json(
+            args.output,
+            rows,
+            benchmark="workers",
+            sessions=args.sessions,
+            clients=args.clients,
+            duration=args.duration,
+            cpus=os.cpu_count(),
+        )
+
+
+def int_list(text: str) -> list[int]:
+    return [int(item) for item in text.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", type=lambda text: text.split(","), default=["sse", "stateless", "stateful"])
+    parser.add_argument("--workers", type=int_list, default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=32, help="并发会话总数")
+    parser.add_argument("--clients", type=int, default=4, help="压测进程数")
+    parser.add_argument("--duration", type=float, default=10.0, help="每组测试的时长(秒)")
+    parser.add_argument("--output", help="结果写入的 JSON 文件路径")
+    main(parser.parse_args())
@@ -1,5 +1,7 @@
 import json
 import os
+import sys
+import time
 import asyncio
 from typing import Optional
 from contextlib import AsyncExitStack
@@ -7,22 +9,49 @@ from contextlib import AsyncExitStack
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-from openai import OpenAI
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.result_cache import DEFAULT_MAXSIZE, DEFAULT_TTL, ToolResultCache
+from mcp_common.tool_calls import DEFAULT_MAX_CONCURRENCY, call_tool, call_tools
+from mcp_common.tool_catalog import ToolCatalog
+from mcp_common.tool_index import DEFAULT_TOP_K, ToolIndex, estimate_tokens
+
 # 加载.env文件中的环境变量
 load_dotenv()
 
 class MCPClient:
-    def __init__(self):
+    def __init__(
+        self,
+        tool_ttl: Optional[float] = None,
+        max_steps: int = 8,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        tool_top_k: Optional[int] = DEFAULT_TOP_K,
+        result_cache_size: int = DEFAULT_MAXSIZE,
+        result_cache_ttl: Optional[float] = DEFAULT_TTL,
+    ):
         # 初始化会话和客户端对象
         self.session: Optional[ClientSession] = None # 用于保存 MCP 客户端会话
         self.exit_stack = AsyncExitStack()  # 用于管理异步资源的生命周期
-        # 初始化 OpenAI 客户端
-        self.client = OpenAI(
-            base_url=os.getenv("BASE_URL"),
-            api_key=os.getenv("API_KEY"),  # 从环境变量中获取 API 密钥
+        # 只读/幂等工具的结果缓存，result_cache_size 为 0 时不缓存
+        self.result_cache = (
+            ToolResultCache(maxsize=result_cache_size, ttl=result_cache_ttl) if result_cache_size > 0 else None
         )
+        # 工具目录缓存，tool_ttl 为缓存有效期(秒)，None 表示只在 list_changed 时刷新
+        self.tool_catalog = ToolCatalog(ttl=tool_ttl, result_cache=self.result_cache)
+        # 进程内共享的异步 LLM 网关，模型调用不会阻塞事件循环
+        self.llm = get_gateway()
+        # 单次查询的 LLM 最大往返次数与 token 预算
+        self.max_steps = max_steps
+        self.max_tokens = max_tokens
+        self.last_query_stats = {"rounds": 0, "tokens": 0}
+        # 流式模式：边生成边输出，工具参数一完整就立即调用
+        self.stream = stream
+        # 工具检索索引：每次查询只把最相关的 tool_top_k 个工具发给 LLM，None 表示发送全部
+        self.tool_top_k = tool_top_k
+        self.tool_index = ToolIndex()
 
     async def connect_to_server(self, server_script_path: str):
         """
@@ -50,13 +79,17 @@ class MCPClient:
         )
         self.stdio, self.write = stdio_transport
         # 创建并初始化 MCP 客户端会话
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_catalog.message_handler)
+        )
 
         await self.session.initialize() # 初始化会话
+        if self.result_cache is not None:
+            self.result_cache.bind(self.session, os.path.abspath(server_script_path))
+        self.tool_catalog.bind(self.session)
 
-        # 列出可用工具
-        response = await self.session.list_tools()
-        tools = response.tools
+        # 列出可用工具，结果缓存在工具目录中
+        tools = await self.tool_catalog.tools()
         print("\nConnected to server with tools:", [tool.name for tool in tools]) # 打印可用工具名称
 
     async def process_query(self, query: str) -> str:
@@ -69,66 +102,186 @@ class MCPClient:
             }
         ]
 
-        # 获取可用工具列表并构造工具调用格式
-        response = await self.session.list_tools()
-        available_tools =[
-            {
-                "type": "function",
-                "function": {
-                    "name":tool.name, # 工具名称
-                    "description": tool.description,  # 工具描述
-                    "parameters": tool.inputSchema # 输入参数格式
-                }
-            }
-        for tool in response.tools]
+        # 从工具目录获取已转换好的工具调用格式，再按查询挑出最相关的工具
+        available_tools, saved = await self._select_tools(query)
 
-        # 调用 LLM 模型生成回复
-        response = self.client.chat.completions.create(
-            model=os.getenv("MODEL"),  # 使用的模型名称
-            messages=messages, # 对话历史
-            tools=available_tools # 可用工具列表
-        )
-
-        # 处理模型回复并执行工具调用（如有）
-        tool_results = []
         final_text = []
+        rounds = 0  # LLM 往返次数
+        tokens = 0  # 本次查询累计消耗的 token
 
-        for choice in response.choices:
+        # 循环调用 LLM，直到模型不再请求工具或超出预算
+        while True:
+            response = await self.llm.chat(
+                model=os.getenv("MODEL"),  # 使用的模型名称
+                messages=messages, # 对话历史
+                tools=available_tools # 可用工具列表
+            )
+            rounds += 1
+            if response.usage:
+                tokens += response.usage.total_tokens
+
+            choice = response.choices[0]
             message = choice.message
-            is_function_call = message.tool_calls
-
-            if is_function_call:
-                tool_call = message.tool_calls[0]
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-
-                # 执行工具调用
-                result = await self.session.call_tool(tool_name, tool_args)
-                tool_results.append({"call": tool_name, "result": result})
-                final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")  # 记录调用信息
-
-                # 将工具调用结果加入对话历史
-                if message.content and hasattr(message.content, 'text'):
-                    messages.append({
-                        "role": "assistant",
-                        "content": message.content
-                    })
-
-                messages.append({
-                    "role": "user",
-                    "content": result.content[0].text
-                })
-
-                # 再次调用 LLM 获取最终回复
-                response = self.client.chat.completions.create(
-                    model=os.getenv("MODEL"),
-                    messages=messages,
+            if message.content:
+                final_text.append(message.content) # 添加模型回复
+            if choice.finish_reason != "tool_calls" or not message.tool_calls:
+                break
+
+            # 本轮所有工具调用一次性并发执行，结果以 tool 消息按 tool_call_id 回传
+            messages.append(message.model_dump(exclude_none=True))
+            for tool_call in message.tool_calls:
+                final_text.append(f"[Calling tool {tool_call.function.name} with args {tool_call.function.arguments}]")  # 记录调用信息
+            messages.extend(await call_tools(self.session, message.tool_calls, cache=self.result_cache))
+
+            if self._over_budget(rounds, tokens, final_text):
+                break
+
+        self.last_query_stats = {
+            "rounds": rounds,
+            "tokens": tokens,
+            "tools": len(available_tools),
+            "tool_tokens_saved": saved * rounds,
+        }
+        return "\n".join(final_text)  # 返回最终回复内容
+
+    async def _select_tools(self, query: str) -> tuple[list, int]:
+        """
+        挑选本次查询要发给 LLM 的工具
+        :return: (工具列表, 每次 LLM 调用估算节省的 prompt token 数)
+        """
+        available_tools = await self.tool_catalog.functions()
+        if self.tool_top_k is None or len(available_tools) <= self.tool_top_k:
+            return available_tools, 0
+        # 工具列表变化后只增量更新有变化的工具
+        self.tool_index.update(available_tools)
+        selected = self.tool_index.search(query, self.tool_top_k)
+        if not selected:
+            # 查询和任何工具都没有共同词时退回发送全部工具
+            return available_tools, 0
+        return selected, estimate_tokens(available_tools) - estimate_tokens(selected)
+
+    def _over_budget(self, rounds: int, tokens: int, final_text: list) -> bool:
+        """判断本次查询是否超出轮数或 token 预算"""
+        if rounds >= self.max_steps:
+            final_text.append(f"[已达到最大轮数 {self.max_steps}，停止调用]")
+            return True
+        if self.max_tokens is not None and tokens >= self.max_tokens:
+            final_text.append(f"[已消耗 {tokens} tokens，超出预算 {self.max_tokens}，停止调用]")
+            return True
+        return False
+
+    async def process_query_stream(self, query: str) -> str:
+        """流式处理用户查询，token 到达即打印，每个工具调用的参数一完整就立即发给 MCP 会话"""
+
+        messages = [{"role": "user", "content": query}]
+        available_tools, saved = await self._select_tools(query)
+
+        final_text = []
+        rounds = 0
+        tokens = 0
+        start = time.perf_counter()
+        first_token = None  # 首个 token 到达耗时
+        first_tool = None  # 首个工具开始调用耗时
+        semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENCY)
+
+        async def run_tool(call: dict) -> dict:
+            async with semaphore:
+                return await call_tool(
+                    self.session, call["id"], call["name"], call["arguments"], cache=self.result_cache
                 )
-                final_text.append(response.choices[0].message.content) # 添加模型最终回复
-            else:
-                final_text.append(message.content) # 直接添加模型回复
 
-        return "\n".join(final_text)  # 返回最终回复内容
+        while True:
+            content = []
+            calls: dict[int, dict] = {}  # 按 index 拼接流式返回的工具调用
+            tasks: dict[int, asyncio.Task] = {}
+            finish_reason = None
+
+            def dispatch(index: int):
+                nonlocal first_tool
+                if index in tasks:
+                    return
+                call = calls[index]
+                if first_tool is None:
+                    first_tool = time.perf_counter() - start
+                print(f"\n[Calling tool {call['name']} with args {call['arguments']}]", flush=True)
+                tasks[index] = asyncio.create_task(run_tool(call))
+
+            try:
+                async for chunk in self.llm.stream_chat(
+                    model=os.getenv("MODEL"),
+                    messages=messages,
+                    tools=available_tools,
+                    stream_options={"include_usage": True},
+                ):
+                    if chunk.usage:
+                        tokens += chunk.usage.total_tokens
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+                    if delta.content:
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        print(delta.content, end="", flush=True)
+                        content.append(delta.content)
+                    for tool_delta in delta.tool_calls or []:
+                        # 出现新的 index，说明之前的工具调用参数已经生成完毕
+                        for index in list(calls):
+                            if index < tool_delta.index:
+                                dispatch(index)
+                        call = calls.setdefault(tool_delta.index, {"id": "", "name": "", "arguments": ""})
+                        if tool_delta.id:
+                            call["id"] = tool_delta.id
+                        if tool_delta.function and tool_delta.function.name:
+                            call["name"] += tool_delta.function.name
+                        if tool_delta.function and tool_delta.function.arguments:
+                            call["arguments"] += tool_delta.function.arguments
+                            # 参数已经是完整的 JSON 对象时不必等到下一个工具调用
+                            if call["arguments"].rstrip().endswith("}") and _is_json(call["arguments"]):
+                                dispatch(tool_delta.index)
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+            except BaseException:
+                # 流中途出错或被取消，已经提前发出的工具调用不再需要，取消并等待它们结束，避免成为孤儿任务
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                raise
+            rounds += 1
+
+            if content:
+                final_text.append("".join(content))
+            if finish_reason != "tool_calls" or not calls:
+                break
+
+            for index in calls:
+                dispatch(index)
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content) or None,
+                "tool_calls": [
+                    {
+                        "id": calls[index]["id"],
+                        "type": "function",
+                        "function": {"name": calls[index]["name"], "arguments": calls[index]["arguments"]},
+                    }
+                    for index in sorted(calls)
+                ],
+            })
+            messages.extend(await asyncio.gather(*(tasks[index] for index in sorted(calls))))
+
+            if self._over_budget(rounds, tokens, final_text):
+                break
+
+        self.last_query_stats = {
+            "rounds": rounds,
+            "tokens": tokens,
+            "ttft": first_token,
+            "ttf_tool": first_tool,
+            "tools": len(available_tools),
+            "tool_tokens_saved": saved * rounds,
+        }
+        return "\n".join(final_text)
 
     async def chat_loop(self):
         """运行交互式聊天循环"""
@@ -142,8 +295,24 @@ class MCPClient:
                 if query.lower() == 'quit': # 如果输入 quit 则退出循环
                     break
 
-                response = await self.process_query(query)  # 处理用户查询
-                print("\n" + response) # 打印回复
+                if self.stream:
+                    # 流式模式下回复已经边生成边打印
+                    await self.process_query_stream(query)
+                    print()
+                else:
+                    response = await self.process_query(query)  # 处理用户查询
+                    print("\n" + response) # 打印回复
+                stats = self.last_query_stats
+                print(f"[LLM round trips: {stats['rounds']}, tokens: {stats['tokens']}]")
+                print(f"[tools sent: {stats['tools']}, "
+                      f"prompt tokens saved by tool selection: ~{stats['tool_tokens_saved']}]")
+                if self.result_cache is not None:
+                    cache = self.result_cache.stats()
+                    print(f"[tool result cache: {cache['hits']} hits, {cache['misses']} misses, "
+                          f"{cache['bypassed']} uncacheable calls]")
+                if self.stream:
+                    print(f"[time to first token: {_format_seconds(stats['ttft'])}, "
+                          f"time to first tool: {_format_seconds(stats['ttf_tool'])}]")
 
             except Exception as e:
                 print(f"\nError: {str(e)}")
@@ -153,13 +322,30 @@ class MCPClient:
         await self.exit_stack.aclose()  # 关闭所有异步资源
 
 
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds:.3f}s"
+
+
 async def main():
     if len(sys.argv) < 2:
-        print("Usage: python main.py <path_to_server_script>")
+        print("Usage: python main.py <path_to_server_script> [--stream]")
         sys.exit(1)
 
-    # 创建 MCP 客户端
-    client = MCPClient()
+    # 创建 MCP 客户端，--stream 开启流式输出
+    # TOOL_RESULT_CACHE_SIZE=0 关闭工具结果缓存
+    client = MCPClient(
+        stream="--stream" in sys.argv[2:],
+        result_cache_size=int(os.getenv("TOOL_RESULT_CACHE_SIZE", str(DEFAULT_MAXSIZE))),
+        result_cache_ttl=float(os.getenv("TOOL_RESULT_CACHE_TTL", str(DEFAULT_TTL))),
+    )
     try:
         # 将客户端链接到 MCP Server
         await client.connect_to_server(sys.argv[1])
@@ -168,9 +354,9 @@ async def main():
     finally:
         # 程序终止，清理资源
         await client.cleanup()
+        await close_gateway()
 
 
 if __name__ == "__main__":
-    import sys
     # 异步运行主函数
     asyncio.run(main())
@@ -1,8 +1,25 @@
 import json
+import os
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from mcp.server import FastMCP
+from mcp.types import ToolAnnotations
 
-# 准备模拟数据
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.pagination import enable_pagination
+from mcp_common.record_store import SQLiteRecordStore
+
+# 用户数据放在 SQLite 中，两张表在同一个数据库文件里
+user_db = os.getenv("USER_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "users.db"))
+user_cache_size = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# 列表接口每页返回的条数
+page_size = int(os.getenv("MCP_PAGE_SIZE", "100"))
+user_store = SQLiteRecordStore(user_db, table="users", cache_size=user_cache_size)
+resource_store = SQLiteRecordStore(user_db, table="user_resources", cache_size=user_cache_size)
+
+# 准备模拟数据，空库时写入
 # 用户信息数组，用户信息key是用户名，value是用户信息
 users = {
     "alice": {"name": "Alice", "age": 25},
@@ -29,12 +46,25 @@ config = {
     "app_email": "fastmcp@gmail.com",
 }
 
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    if await user_store.count() == 0:
+        await user_store.put_many(users)
+    if await resource_store.count() == 0:
+        await resource_store.put_many(resources)
+    yield
+
+
 mcp: FastMCP = FastMCP(
     name="这是FastMCP的参数name",
     instructions="""
     这是FastMCP的参数instructions.
-    """
+    """,
+    lifespan=app_lifespan,
 )
+# tools/resources/prompts 列表按游标分页返回
+enable_pagination(mcp, page_size=page_size)
 
 
 #             @server.tool()
@@ -50,15 +80,28 @@ mcp: FastMCP = FastMCP(
 #             async def async_tool(x: int, context: Context) -> str:
 #                 await context.report_progress(50, 100)
 #                 return str(x)
-@mcp.tool()
-def custom_tool(name: str) -> str:
+# 只读取用户数据的工具，客户端可以缓存调用结果
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False))
+async def custom_tool(name: str) -> str:
     """
     获取指定用户的信息
     """
-    key = name.lower()
-    if key not in users:
+    user = await user_store.get(name.lower())
+    if user is None:
         return json.dumps({"error": f"用户 {name} 不存在"})
-    return json.dumps(users[key], ensure_ascii=False)
+    return json.dumps(user, ensure_ascii=False)
+
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False))
+async def custom_tool_batch(names: list[str]) -> str:
+    """
+    一次获取多个用户的信息
+    """
+    found = await user_store.get_many(name.lower() for name in names)
+    result = {
+        name: found.get(name.lower(), {"error": f"用户 {name} 不存在"}) for name in names
+    }
+    return json.dumps(result, ensure_ascii=False)
 
 
 #             @server.resource("resource://my-resource")
@@ -79,11 +122,22 @@ def custom_tool(name: str) -> str:
 #                 data = await fetch_weather(city)
 #                 return f"Weather for {city}: {data}"
 @mcp.resource("resource://{user_name}")
-def custom_resource_template(user_name: str) -> str:
+async def custom_resource_template(user_name: str) -> str:
     """
     获取指定用户的资源列表
     """
-    return json.dumps(resources[user_name])
+    user_resources = await resource_store.get(user_name)
+    if user_resources is None:
+        return json.dumps({"error": f"用户 {user_name} 不存在"})
+    return json.dumps(user_resources)
+
+
+@mcp.resource("resource://batch/{user_names}")
+async def custom_resource_batch(user_names: str) -> str:
+    """
+    获取多个用户的资源列表，user_names 用逗号分隔
+    """
+    return json.dumps(await resource_store.get_many(user_names.split(",")))
 
 
 @mcp.resource("config://app")
@@ -1,17 +1,21 @@
 import logging, sys
 from fastmcp import FastMCP
+from mcp.types import ToolAnnotations
 
 # 把日志写到 stderr，避免污染 stdout（JSON-RPC）
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 
 mcp = FastMCP("Demo 🚀")
 
-@mcp.tool
+# 纯函数工具：不修改任何状态，相同参数总是返回相同结果，客户端可以缓存
+PURE = ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False)
+
+@mcp.tool(annotations=PURE)
 def add(a: int, b: int) -> int:
     """Add two numbers"""
     return a + b
 
-@mcp.tool
+@mcp.tool(annotations=PURE)
 def hello(name: str) -> str:
     """Say hello to someone"""
     return f"Hello, {name}! 👋"
@@ -0,0 +1,62 @@
+"""
+各示例目录共用的工具(LLM 网关、工具调用、缓存、会话池等)
+脚本在各自目录下运行时，需要先把仓库根目录加入 sys.path 再导入
+"""
+from mcp_common.cache import TTLCache
+from mcp_common.file_store import FileStore
+from mcp_common.llm_gateway import LLMGateway, close_gateway, get_gateway
+from mcp_common.log_sink import LogSink, enable_log_level
+from mcp_common.metrics import percentile
+from mcp_common.pagination import (
+    enable_pagination,
+    iter_prompts,
+    iter_resource_templates,
+    iter_resources,
+    iter_tools,
+)
+from mcp_common.progress import ProgressReporter
+from mcp_common.record_store import RecordStore, SQLiteRecordStore
+from mcp_common.result_cache import ToolResultCache
+from mcp_common.sampling import ConcurrentSamplingSession, SamplingHandler
+from mcp_common.sampling_batch import SamplingBatch
+from mcp_common.serving import run_server
+from mcp_common.session_pool import StdioSessionPool
+from mcp_common.subscriptions import enable_subscriptions
+from mcp_common.text_chunks import iter_file_chunks, split_text
+from mcp_common.tool_calls import call_tool, call_tools, result_text
+from mcp_common.tool_catalog import ToolCatalog, tool_to_function
+from mcp_common.tool_index import ToolIndex
+
+__all__ = [
+    "ConcurrentSamplingSession",
+    "FileStore",
+    "LLMGateway",
+    "LogSink",
+    "ProgressReporter",
+    "RecordStore",
+    "SQLiteRecordStore",
+    "SamplingBatch",
+    "SamplingHandler",
+    "StdioSessionPool",
+    "TTLCache",
+    "ToolCatalog",
+    "ToolIndex",
+    "ToolResultCache",
+    "call_tool",
+    "call_tools",
+    "close_gateway",
+    "enable_log_level",
+    "enable_pagination",
+    "enable_subscriptions",
+    "get_gateway",
+    "iter_file_chunks",
+    "iter_prompts",
+    "iter_resource_templates",
+    "iter_resources",
+    "iter_tools",
+    "percentile",
+    "result_text",
+    "run_server",
+    "split_text",
+    "tool_to_function",
+]
@@ -0,0 +1,107 @@
+"""
+基于文件的资源存储
+只允许读取根目录下的文件，解码后的内容缓存在内存中，缓存总字节数有上限(LRU 淘汰)；
+每次读取只做一次 stat，mtime/size 没变就直接返回缓存，变了才重新读取
+"""
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Union
+
+import aiofiles
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class _Entry:
+    version: tuple[int, int]  # (st_mtime_ns, st_size)
+    content: Union[str, bytes]
+    nbytes: int
+
+
+class FileStore:
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES, encoding: str = "utf-8"):
+        """
+        :param root: 根目录，只能读取该目录下的文件
+        :param max_bytes: 内存缓存的总字节数上限，单个超过上限的文件不缓存
+        :param encoding: 文本文件编码
+        """
+        self.root = os.path.realpath(root)
+        self.max_bytes = max_bytes
+        self.encoding = encoding
+        self._cache: OrderedDict[tuple[str, bool], _Entry] = OrderedDict()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0  # 首次读取或文件变化后重新读取的次数
+        self.evictions = 0
+
+    def resolve(self, path: str) -> str:
+        """把相对路径解析为根目录下的绝对路径，禁止通过 .. 或软链接跳出根目录"""
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            raise ValueError(f"路径不在资源根目录下: {path}")
+        return full_path
+
+    @staticmethod
+    def version(full_path: str) -> tuple[int, int]:
+        stat = os.stat(full_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def list_files(self) -> list[str]:
+        """返回根目录下所有文件的相对路径"""
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                files.append(os.path.relpath(os.path.join(directory, name), self.root))
+        return sorted(files)
+
+    async def read_text(self, path: str) -> str:
+        return (await self._read(path, binary=False))[0]
+
+    async def read_bytes(self, path: str) -> bytes:
+        return (await self._read(path, binary=True))[0]
+
+    async def read_text_versioned(self, path: str) -> tuple[str, tuple[int, int]]:
+        """读取文本，同时返回这份内容对应的文件版本，调用方可以用它作为派生结果的缓存 key"""
+        return await self._read(path, binary=False)
+
+    async def _read(self, path: str, binary: bool) -> tuple[Union[str, bytes], tuple[int, int]]:
+        full_path = self.resolve(path)
+        version = self.version(full_path)
+        key = (full_path, binary)
+        entry = self._cache.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return entry.content, version
+
+        self.misses += 1
+        async with aiofiles.open(full_path, mode="rb") as fp:
+            data = await fp.read()
+        content = data if binary else data.decode(self.encoding)
+        self._store(key, _Entry(version=version, content=content, nbytes=len(data)))
+        return content, version
+
+    def _store(self, key: tuple[str, bool], entry: _Entry):
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self.cached_bytes -= old.nbytes
+        if entry.nbytes > self.max_bytes:
+            return
+        self._cache[key] = entry
+        self.cached_bytes += entry.nbytes
+        while self.cached_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.cached_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._cache),
+            "cached_bytes": self.cached_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
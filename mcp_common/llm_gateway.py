@@ -0,0 +1,128 @@
+"""
+异步 LLM 网关
+在 async 代码里调用同步的 OpenAI().chat.completions.create 会阻塞整个事件循环，
+这里统一改为 AsyncOpenAI，进程内共用一个带连接池的 httpx.AsyncClient，
+并统计在途请求数和请求耗时
+"""
+import os
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from mcp_common.metrics import percentile
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+LATENCY_WINDOW = 1000  # 只保留最近 N 次请求的耗时用于计算分位数
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+    ):
+        # 所有请求共用一个连接池，复用 TCP/TLS 连接
+        self.http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        self.client = AsyncOpenAI(
+            base_url=base_url or os.getenv("BASE_URL"),
+            api_key=api_key or os.getenv("API_KEY"),
+            timeout=timeout,
+            http_client=self.http_client,
+        )
+        self.in_flight = 0  # 当前在途请求数
+        self.total = 0  # 已完成请求数
+        self.errors = 0  # 失败请求数
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def chat(self, timeout: Optional[float] = None, **kwargs):
+        """
+        异步调用 chat.completions.create
+        :param timeout: 本次请求的超时时间(秒)，不传则使用网关默认值
+        :param kwargs: 透传给 chat.completions.create 的参数
+        :return: ChatCompletion，stream=True 时为 AsyncStream
+        """
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await self.client.chat.completions.create(**kwargs)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total += 1
+            self.latencies.append(time.perf_counter() - start)
+
+    async def stream_chat(self, timeout: Optional[float] = None, **kwargs):
+        """
+        流式调用 chat.completions.create，逐个产出 chunk
+        在途数和耗时统计覆盖整个流，而不只是拿到响应头的时间
+        """
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            stream = await self.client.chat.completions.create(stream=True, **kwargs)
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total += 1
+            self.latencies.append(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        """返回在途请求数、请求总数、失败数以及耗时统计(秒)"""
+        latencies = sorted(self.latencies)
+
+        return {
+            "in_flight": self.in_flight,
+            "total": self.total,
+            "errors": self.errors,
+            "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "max": latencies[-1] if latencies else 0.0,
+        }
+
+    async def aclose(self):
+        await self.client.close()
+        await self.http_client.aclose()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_gateway() -> LLMGateway:
+    """获取进程内共享的 LLM 网关，首次调用时按环境变量创建"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+async def close_gateway():
+    """关闭进程内共享的 LLM 网关，在程序退出前调用"""
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
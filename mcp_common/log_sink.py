@@ -0,0 +1,169 @@
+"""
+按级别过滤、批量发送的服务端日志
+- enable_log_level 注册 logging/setLevel 处理函数，记录每个会话要求的最低级别
+- LogSink 在格式化之前先按级别过滤，被过滤的日志只增加一个计数；
+  通过过滤的日志放进缓冲区，由后台任务按条数或时间批量发送，保持记录顺序，相邻的重复日志合并为一条；
+  一条通知中只有一条日志时 data 是字符串，连续的多条同级别日志合并发送时 data 是字符串列表；
+  客户端接收跟不上、缓冲区满时丢弃新日志，结束时报告丢弃和合并的条数
+"""
+import asyncio
+import os
+import weakref
+from typing import Any, Optional
+
+from mcp import types
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.session import ServerSession
+
+# MCP 日志级别，从低到高
+LEVELS = ["debug", "info", "notice", "warning", "error", "critical", "alert", "emergency"]
+_SEVERITY = {level: index for index, level in enumerate(LEVELS)}
+
+# 客户端没有调用 logging/setLevel 时使用的最低级别
+DEFAULT_LEVEL = os.getenv("LOG_DEFAULT_LEVEL", "info")
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 0.2
+DEFAULT_MAX_BUFFER = 1000
+
+# 会话 -> 客户端设置的最低级别，会话结束后自动移除
+session_levels: "weakref.WeakKeyDictionary[ServerSession, str]" = weakref.WeakKeyDictionary()
+
+
+def enable_log_level(app: FastMCP):
+    """为 FastMCP 注册 logging/setLevel 处理函数，同时在能力声明中打开 logging"""
+    server = app._mcp_server
+
+    @server.set_logging_level()
+    async def set_level(level: types.LoggingLevel):
+        session_levels[server.request_context.session] = level
+
+
+def session_level(session: ServerSession) -> str:
+    return session_levels.get(session, DEFAULT_LEVEL)
+
+
+class LogSink:
+    def __init__(
+        self,
+        ctx: Context,
+        logger: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+    ):
+        """
+        :param ctx: 工具的上下文对象
+        :param logger: 日志中的 logger 名称
+        :param batch_size: 缓冲区达到该条数时立即发送
+        :param flush_interval: 最长等待多久(秒)发送一次
+        :param max_buffer: 缓冲区上限，超过后丢弃新日志
+        """
+        self.ctx = ctx
+        self.session = ctx.request_context.session
+        self.logger = logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: list[tuple[int, str, str, tuple]] = []  # (序号, 级别, 消息, 参数)
+        self._seq = 0  # 每次 log 调用的序号，被过滤、丢弃的也计数，用于判断两条日志是否真正相邻
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self.filtered = 0  # 级别低于客户端要求、没有格式化的条数
+        self.dropped = 0  # 缓冲区满被丢弃的条数
+        self.coalesced = 0  # 与相邻日志重复而合并的条数
+        self.sent = 0  # 发送的通知数
+
+    async def __aenter__(self) -> "LogSink":
+        self._flusher = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # 不能取消后台任务：flush 已经把缓冲区换出，发送到一半被取消会丢掉这一批剩余的日志
+        self._closing = True
+        self._wakeup.set()
+        await self._flusher
+        await self.flush()
+        if self.dropped and self.enabled("warning"):
+            await self._send(
+                "warning", f"客户端接收日志过慢，已丢弃 {self.dropped} 条，合并重复日志 {self.coalesced} 条"
+            )
+
+    def enabled(self, level: str) -> bool:
+        return _SEVERITY[level] >= _SEVERITY[session_level(self.session)]
+
+    def log(self, level: str, message: str, *args: Any):
+        """
+        记录一条日志，message 和 args 按 % 格式化，只有通过级别过滤后才会格式化
+        不等待发送，调用方不会被慢客户端阻塞
+        """
+        self._seq += 1
+        if not self.enabled(level):
+            self.filtered += 1
+            return
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append((self._seq, level, message, args))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def debug(self, message: str, *args: Any):
+        self.log("debug", message, *args)
+
+    def info(self, message: str, *args: Any):
+        self.log("info", message, *args)
+
+    def warning(self, message: str, *args: Any):
+        self.log("warning", message, *args)
+
+    def error(self, message: str, *args: Any):
+        self.log("error", message, *args)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        按记录顺序发送缓冲区中的日志：连续的同级别日志放在一条通知中，
+        只有紧挨着记录(中间没有其他日志，包括被过滤的)、级别和内容都相同的日志才合并
+        """
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        runs: list[tuple[str, list[list]]] = []  # [(级别, [[消息, 重复次数], ...]), ...]
+        previous = None
+        for seq, level, message, args in batch:
+            text = message % args if args else message
+            if not runs or runs[-1][0] != level:
+                runs.append((level, []))
+            entries = runs[-1][1]
+            if entries and entries[-1][0] == text and previous == seq - 1:
+                entries[-1][1] += 1
+                self.coalesced += 1
+            else:
+                entries.append([text, 1])
+            previous = seq
+        for level, entries in runs:
+            lines = [text if count == 1 else f"{text} (重复 {count} 次)" for text, count in entries]
+            await self._send(level, lines[0] if len(lines) == 1 else lines)
+
+    async def _send(self, level: str, data: Any):
+        self.sent += 1
+        await self.session.send_log_message(
+            level=level, data=data, logger=self.logger, related_request_id=self.ctx.request_id
+        )
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "filtered": self.filtered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
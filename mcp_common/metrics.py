@@ -0,0 +1,17 @@
+"""
+耗时统计的公用函数
+"""
+from collections.abc import Iterable
+
+
+def percentile(values: Iterable[float], p: float) -> float:
+    """
+    按最近秩法取分位数
+    :param values: 样本，不要求有序
+    :param p: 分位，0 到 1 之间，如 0.95
+    :return: 分位数，没有样本时返回 0.0
+    """
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p))]
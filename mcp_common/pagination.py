@@ -0,0 +1,200 @@
+"""
+列表接口的游标分页
+服务端：enable_pagination 替换 FastMCP 的 tools/resources/resource templates/prompts 列表处理函数，
+每次只转换并返回一页，nextCursor 是编码后的偏移量；
+客户端：iter_tools/iter_resources/iter_resource_templates/iter_prompts 按需逐页拉取，
+只有迭代到下一页时才发出请求
+"""
+import base64
+import binascii
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, Optional
+
+from mcp import ClientSession, types
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.exceptions import McpError
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """游标对客户端是不透明的，解析失败时按协议返回 Invalid params"""
+    if not cursor:
+        return 0
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        offset = -1
+    if offset < 0:
+        raise McpError(types.ErrorData(code=types.INVALID_PARAMS, message=f"无效的游标: {cursor}"))
+    return offset
+
+
+def paginate(items: list, cursor: Optional[str], page_size: int) -> tuple[list, Optional[str]]:
+    """
+    按游标切出一页
+    :return: (本页条目, 下一页游标)，最后一页的游标为 None
+    """
+    offset = decode_cursor(cursor)
+    end = offset + page_size
+    next_cursor = encode_cursor(end) if end < len(items) else None
+    return items[offset:end], next_cursor
+
+
+def _cursor_of(request) -> Optional[str]:
+    if request is None or request.params is None:
+        return None
+    return request.params.cursor
+
+
+def _to_tool(info) -> types.Tool:
+    return types.Tool(
+        name=info.name,
+        title=info.title,
+        description=info.description,
+        inputSchema=info.parameters,
+        outputSchema=info.output_schema,
+        annotations=info.annotations,
+        icons=info.icons,
+        _meta=info.meta,
+    )
+
+
+def _to_resource(resource) -> types.Resource:
+    return types.Resource(
+        uri=resource.uri,
+        name=resource.name or "",
+        title=resource.title,
+        description=resource.description,
+        mimeType=resource.mime_type,
+        icons=resource.icons,
+        annotations=resource.annotations,
+        _meta=resource.meta,
+    )
+
+
+def _to_template(template) -> types.ResourceTemplate:
+    return types.ResourceTemplate(
+        uriTemplate=template.uri_template,
+        name=template.name,
+        title=template.title,
+        description=template.description,
+        mimeType=template.mime_type,
+        icons=template.icons,
+        annotations=template.annotations,
+        _meta=template.meta,
+    )
+
+
+def _to_prompt(prompt) -> types.Prompt:
+    return types.Prompt(
+        name=prompt.name,
+        title=prompt.title,
+        description=prompt.description,
+        arguments=[
+            types.PromptArgument(name=arg.name, description=arg.description, required=arg.required)
+            for arg in (prompt.arguments or [])
+        ],
+        icons=prompt.icons,
+    )
+
+
+def enable_pagination(app: FastMCP, page_size: int = DEFAULT_PAGE_SIZE):
+    """
+    让 FastMCP 的四个列表接口按 page_size 分页返回
+    先在注册表上切片，只转换这一页，注册表很大时单次请求的开销与总数无关
+    通过底层 Server 的列表装饰器注册，工具缓存(用于校验参数和结构化输出)由装饰器按返回的工具更新
+    :param app: FastMCP 实例，在注册完工具/资源/提示词前后调用都可以
+    :param page_size: 每页条数
+    """
+    if page_size <= 0:
+        raise ValueError("page_size 必须大于 0")
+    server = app._mcp_server
+
+    # 参数的类型注解必须正好是请求类型，装饰器才会把请求(游标)传进来
+    @server.list_tools()
+    async def list_tools(request: types.ListToolsRequest) -> types.ListToolsResult:
+        infos = app._tool_manager.list_tools()
+        if request is None:
+            # 底层 Server 在 call_tool 时找不到工具定义会以 None 调用本函数刷新工具缓存，此时返回全部工具
+            return types.ListToolsResult(tools=[_to_tool(info) for info in infos])
+        page, next_cursor = paginate(infos, _cursor_of(request), page_size)
+        return types.ListToolsResult(tools=[_to_tool(info) for info in page], nextCursor=next_cursor)
+
+    @server.list_resources()
+    async def list_resources(request: types.ListResourcesRequest) -> types.ListResourcesResult:
+        page, next_cursor = paginate(
+            app._resource_manager.list_resources(), _cursor_of(request), page_size
+        )
+        return types.ListResourcesResult(
+            resources=[_to_resource(resource) for resource in page], nextCursor=next_cursor
+        )
+
+    @server.list_prompts()
+    async def list_prompts(request: types.ListPromptsRequest) -> types.ListPromptsResult:
+        page, next_cursor = paginate(app._prompt_manager.list_prompts(), _cursor_of(request), page_size)
+        return types.ListPromptsResult(prompts=[_to_prompt(prompt) for prompt in page], nextCursor=next_cursor)
+
+    async def list_resource_templates(request: types.ListResourceTemplatesRequest) -> types.ServerResult:
+        page, next_cursor = paginate(
+            app._resource_manager.list_templates(), _cursor_of(request), page_size
+        )
+        return types.ServerResult(types.ListResourceTemplatesResult(
+            resourceTemplates=[_to_template(template) for template in page], nextCursor=next_cursor
+        ))
+
+    # 底层 Server 的 list_resource_templates 装饰器只接受无参函数，拿不到游标，只能直接注册处理函数
+    server.request_handlers[types.ListResourceTemplatesRequest] = list_resource_templates
+
+
+async def iter_pages(
+    fetch: Callable[[types.PaginatedRequestParams | None], Awaitable[Any]],
+    items: Callable[[Any], list],
+    cursor: Optional[str] = None,
+) -> AsyncIterator[list]:
+    """
+    逐页拉取列表，直到没有 nextCursor
+    :param fetch: 接收分页参数、返回列表结果的函数，如 session.list_resources
+    :param items: 从结果中取出条目列表的函数
+    :param cursor: 起始游标，None 表示从第一页开始
+    """
+    seen = set()
+    while True:
+        params = types.PaginatedRequestParams(cursor=cursor) if cursor else None
+        result = await fetch(params=params)
+        yield items(result)
+        cursor = result.nextCursor
+        if not cursor:
+            return
+        # 防止服务端返回重复游标导致死循环
+        if cursor in seen:
+            raise RuntimeError(f"服务端返回了重复的游标: {cursor}")
+        seen.add(cursor)
+
+
+async def _iter_items(pages: AsyncIterator[list]) -> AsyncIterator:
+    async for page in pages:
+        for item in page:
+            yield item
+
+
+def iter_tools(session: ClientSession) -> AsyncIterator[types.Tool]:
+    return _iter_items(iter_pages(session.list_tools, lambda result: result.tools))
+
+
+def iter_resources(session: ClientSession) -> AsyncIterator[types.Resource]:
+    return _iter_items(iter_pages(session.list_resources, lambda result: result.resources))
+
+
+def iter_resource_templates(session: ClientSession) -> AsyncIterator[types.ResourceTemplate]:
+    return _iter_items(
+        iter_pages(session.list_resource_templates, lambda result: result.resourceTemplates)
+    )
+
+
+def iter_prompts(session: ClientSession) -> AsyncIterator[types.Prompt]:
+    return _iter_items(iter_pages(session.list_prompts, lambda result: result.prompts))
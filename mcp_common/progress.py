@@ -0,0 +1,71 @@
+"""
+合并发送的进度通知
+任务很多时每完成一项就发一次 notifications/progress 会占满传输通道，
+ProgressReporter 在距上次通知超过 interval 秒或进度前进了至少 min_step 时才发送，最终进度总会发送；
+通知数最多约为 1/min_step 加上耗时除以 interval
+"""
+import time
+from typing import Optional
+
+from mcp.server.fastmcp import Context
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_MIN_STEP = 0.01
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        ctx: Context,
+        total: Optional[int] = None,
+        interval: float = DEFAULT_INTERVAL,
+        min_step: float = DEFAULT_MIN_STEP,
+    ):
+        """
+        :param ctx: 工具的上下文对象，使用客户端请求中的 progressToken，客户端没有提供时不发送
+        :param total: 总数，未知时为 None(此时只按时间间隔合并)
+        :param interval: 距上次通知超过该时间(秒)就发送
+        :param min_step: 进度比上次通知前进了该比例就发送，即使还没到 interval，如 0.01 表示 1%
+        """
+        self.ctx = ctx
+        self.total = total
+        self.interval = interval
+        self.min_step = min_step
+        self.completed = 0
+        self.sent = 0  # 已发送的通知数
+        self.coalesced = 0  # 被合并而没有单独发送的进度更新数
+        self._last_time = float("-inf")
+        self._last_completed = 0
+        meta = ctx.request_context.meta
+        self.enabled = meta is not None and meta.progressToken is not None
+
+    def _due(self) -> bool:
+        if time.monotonic() - self._last_time >= self.interval:
+            return True
+        if self.total:
+            return (self.completed - self._last_completed) / self.total >= self.min_step
+        return False
+
+    async def advance(self, count: int = 1, message: Optional[str] = None):
+        """记录完成了 count 项，满足合并条件时发送一次通知"""
+        self.completed += count
+        if not self.enabled:
+            return
+        if self.completed != self.total and not self._due():
+            self.coalesced += 1
+            return
+        await self._send(message)
+
+    async def flush(self, message: Optional[str] = None):
+        """发送当前进度(如果还有未发送的更新)"""
+        if self.enabled and self.completed != self._last_completed:
+            await self._send(message)
+
+    async def _send(self, message: Optional[str]):
+        self._last_time = time.monotonic()
+        self._last_completed = self.completed
+        self.sent += 1
+        await self.ctx.report_progress(self.completed, self.total, message)
+
+    def stats(self) -> dict:
+        return {"completed": self.completed, "sent": self.sent, "coalesced": self.coalesced}
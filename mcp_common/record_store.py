@@ -0,0 +1,117 @@
+"""
+资源模板背后的记录存储
+RecordStore 定义按 key 读取 JSON 记录(任意可序列化的值)的接口，SQLiteRecordStore 是基于 SQLite 的实现：
+key 为主键(WITHOUT ROWID 聚簇索引)，热点记录缓存在 LRU 中，get_many 一次查询批量读取
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from typing import Any
+
+from mcp_common.cache import TTLCache
+
+DEFAULT_CACHE_SIZE = 10000
+BATCH_SIZE = 500  # 单条 SQL 中 IN (...) 的参数个数上限，低于 SQLite 的默认限制
+_MISSING = object()  # 缓存未命中，记录本身可以是 None(JSON null)
+
+
+class RecordStore(ABC):
+    """记录存储接口，子类实现 get_many/put_many/count，缺少任何一个时创建实例就会报错"""
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """读取单条记录，不存在时返回 default；需要区分不存在和记录值为 None 时使用 get_many"""
+        return (await self.get_many([key])).get(key, default)
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """批量读取，返回 key -> 记录，不存在的 key 不出现在结果中"""
+
+    @abstractmethod
+    async def put_many(self, records: dict[str, Any]):
+        """批量写入，已存在的 key 覆盖"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """记录总数"""
+
+
+class SQLiteRecordStore(RecordStore):
+    def __init__(self, path: str, table: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        :param path: 数据库文件路径，":memory:" 表示内存数据库
+        :param table: 表名
+        :param cache_size: LRU 缓存的记录数
+        """
+        if not table.isidentifier():
+            raise ValueError(f"非法的表名: {table}")
+        self.table = table
+        self.cache = TTLCache(maxsize=cache_size)
+        # 写入开始和结束时各加一，读取期间版本变化说明读到的可能是旧值，不放入缓存
+        self._version = 0
+        # sqlite3 是阻塞调用，放到线程中执行；同一个连接用锁串行访问
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID"
+            )
+
+    def _select(self, keys: list[str]) -> dict[str, Any]:
+        records = {}
+        with self._lock:
+            for start in range(0, len(keys), BATCH_SIZE):
+                batch = keys[start:start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, data FROM {self.table} WHERE key IN ({placeholders})", batch
+                )
+                for key, data in rows:
+                    records[key] = json.loads(data)
+        return records
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        records = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            record = self.cache.get(key, _MISSING)
+            if record is _MISSING:
+                missing.append(key)
+            else:
+                records[key] = record
+        if missing:
+            version = self._version
+            loaded = await asyncio.to_thread(self._select, missing)
+            if self._version == version:
+                for key, record in loaded.items():
+                    self.cache.set(key, record)
+            records.update(loaded)
+        return records
+
+    def _upsert(self, records: dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, data) VALUES (?, ?)",
+                [(key, json.dumps(record, ensure_ascii=False)) for key, record in records.items()],
+            )
+
+    async def put_many(self, records: dict[str, Any]):
+        self._version += 1
+        try:
+            await asyncio.to_thread(self._upsert, records)
+        finally:
+            for key in records:
+                self.cache.pop(key)
+            self._version += 1
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._count)
+
+    def close(self):
+        self._conn.close()
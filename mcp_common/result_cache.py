@@ -0,0 +1,84 @@
+"""
+客户端工具结果缓存
+服务端通过工具注解(readOnlyHint / idempotentHint)声明的纯函数工具，相同参数的调用结果可以复用，
+ToolResultCache 按 (服务端, 工具名, 规范化参数) 缓存 tools/call 的结果，省掉重复的 JSON-RPC 往返；
+没有声明注解的工具总是直接调用，出错的结果不缓存，服务端的工具列表变化时该服务端的缓存作废
+"""
+import json
+import weakref
+from datetime import timedelta
+from typing import Any, Optional
+
+from mcp import ClientSession
+from mcp.types import CallToolResult, Tool
+
+from mcp_common.cache import TTLCache
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300.0
+
+
+def canonical_arguments(arguments: Optional[dict]) -> str:
+    """参数的规范化表示：键排序、去掉多余空白，键顺序不同的相同参数得到同一个 key"""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def is_cacheable(tool: Tool) -> bool:
+    """工具声明为只读或幂等时，结果可以缓存"""
+    annotations = tool.annotations
+    return annotations is not None and bool(annotations.readOnlyHint or annotations.idempotentHint)
+
+
+class ToolResultCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: Optional[float] = DEFAULT_TTL):
+        """
+        :param maxsize: 最多缓存的结果数，超出时淘汰最久未使用的
+        :param ttl: 结果有效期(秒)，None 表示不过期
+        """
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # 会话 -> 服务端名称，会话关闭后自动移除
+        self._servers: "weakref.WeakKeyDictionary[ClientSession, str]" = weakref.WeakKeyDictionary()
+        self._cacheable: dict[str, set[str]] = {}  # 服务端名称 -> 可缓存的工具名
+        self.bypassed = 0  # 工具不可缓存、直接调用的次数
+
+    def bind(self, session: ClientSession, server: str):
+        """
+        记录会话连接的服务端，同一个服务端的不同会话共享缓存
+        :param server: 服务端标识，如脚本路径或 URL
+        """
+        self._servers[session] = server
+
+    def update(self, session: ClientSession, tools: list[Tool]):
+        """根据 tools/list 的结果更新可缓存的工具，工具定义可能已经变化，该服务端的旧结果作废，其他服务端不受影响"""
+        server = self._servers.get(session, "")
+        self._cacheable[server] = {tool.name for tool in tools if is_cacheable(tool)}
+        self.cache.evict(lambda key: key[0] == server)
+
+    def cacheable(self, session: ClientSession, name: str) -> bool:
+        return name in self._cacheable.get(self._servers.get(session, ""), ())
+
+    async def call(
+        self,
+        session: ClientSession,
+        name: str,
+        arguments: Optional[dict[str, Any]] = None,
+        read_timeout_seconds: Optional[timedelta] = None,
+    ) -> CallToolResult:
+        """调用工具，可缓存的工具先查缓存，相同参数的并发调用只发送一次请求"""
+
+        async def load() -> CallToolResult:
+            return await session.call_tool(
+                name=name, arguments=arguments, read_timeout_seconds=read_timeout_seconds
+            )
+
+        if not self.cacheable(session, name):
+            self.bypassed += 1
+            return await load()
+        key = (self._servers.get(session, ""), name, canonical_arguments(arguments))
+        return await self.cache.get_or_load(key, load, should_cache=lambda result: not result.isError)
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats["bypassed"] = self.bypassed
+        stats["cacheable_tools"] = sum(len(names) for names in self._cacheable.values())
+        return stats
@@ -0,0 +1,201 @@
+"""
+客户端采样(sampling/createMessage)处理
+- SamplingHandler 通过进程内共享的 LLM 网关完成服务端的采样请求：
+  带上 systemPrompt 和全部消息、遵守 maxTokens，用信号量限制同时进行的 LLM 调用，
+  可选按请求内容哈希做精确匹配缓存，相同的并发请求只调用一次
+- ConcurrentSamplingSession 让 ClientSession 并发处理服务端的采样请求；
+  默认的 ClientSession 在接收循环中逐个等待回调完成，服务端并发发起的采样只能排队串行执行
+"""
+import asyncio
+import hashlib
+import json
+import os
+import warnings
+from importlib.metadata import version
+from typing import Any, Optional
+
+from mcp import ClientSession, types
+from mcp.shared.session import RequestResponder
+
+from mcp_common.cache import TTLCache
+from mcp_common.llm_gateway import LLMGateway, get_gateway
+
+DEFAULT_MAX_CONCURRENCY = 4
+# ConcurrentSamplingSession 依赖 SDK 的内部实现(BaseSession 的 _received_request、_handle_incoming、
+# _task_group 以及 RequestResponder._completed)，只在验证过的版本上启用，升级 SDK 前需要重新核对
+SUPPORTED_SDK_VERSIONS = ("1.30.",)
+
+
+def to_openai_messages(params: types.CreateMessageRequestParams) -> list[dict]:
+    """
+    把采样请求中的 systemPrompt 和全部消息转换为 OpenAI 的 messages
+    消息内容可以是单个内容块，也可以是内容块列表；工具调用转换为 assistant 消息的 tool_calls，
+    工具结果转换为紧跟其后的 role=tool 消息
+    """
+    messages = []
+    if params.systemPrompt:
+        messages.append({"role": "system", "content": params.systemPrompt})
+    for message in params.messages:
+        blocks = message.content if isinstance(message.content, list) else [message.content]
+        parts, tool_calls = [], []
+        for block in blocks:
+            if block.type == "text":
+                parts.append({"type": "text", "text": block.text})
+            elif block.type == "image":
+                parts.append({
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{block.mimeType};base64,{block.data}"},
+                })
+            elif block.type == "audio":
+                parts.append({
+                    "type": "input_audio",
+                    "input_audio": {"data": block.data, "format": block.mimeType.split("/")[-1]},
+                })
+            elif block.type == "tool_use":
+                tool_calls.append({
+                    "id": block.id,
+                    "type": "function",
+                    "function": {"name": block.name, "arguments": json.dumps(block.input, ensure_ascii=False)},
+                })
+            elif block.type == "tool_result":
+                messages.append({"role": "tool", "tool_call_id": block.toolUseId, "content": tool_result_text(block)})
+            else:
+                raise ValueError(f"不支持的采样消息类型: {block.type}")
+
+        if tool_calls:
+            text = "".join(part["text"] for part in parts if part["type"] == "text")
+            messages.append({"role": message.role, "content": text or None, "tool_calls": tool_calls})
+        elif len(parts) == 1 and parts[0]["type"] == "text":
+            messages.append({"role": message.role, "content": parts[0]["text"]})
+        elif parts:
+            messages.append({"role": message.role, "content": parts})
+    return messages
+
+
+def tool_result_text(block: types.ToolResultContent) -> str:
+    """工具结果中的文本内容，没有文本时使用结构化结果"""
+    texts = [item.text for item in block.content if item.type == "text"]
+    if not texts and block.structuredContent is not None:
+        texts.append(json.dumps(block.structuredContent, ensure_ascii=False))
+    text = "\n".join(texts)
+    return f"工具执行出错: {text}" if block.isError else text
+
+
+class SamplingHandler:
+    def __init__(
+        self,
+        llm: Optional[LLMGateway] = None,
+        model: Optional[str] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+    ):
+        """
+        :param llm: LLM 网关，默认使用进程内共享的网关
+        :param model: 模型名称，默认取环境变量 MODEL
+        :param max_concurrency: 同时进行的 LLM 调用数上限，超出的请求排队等待
+        :param cache_size: 精确匹配缓存的条数，0 表示不缓存
+        :param cache_ttl: 缓存有效期(秒)，None 表示不过期
+        """
+        self.llm = llm or get_gateway()
+        self.model = model or os.getenv("MODEL", "gpt-4o")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        self.requests = 0
+        self.errors = 0
+
+    def cache_key(self, params: types.CreateMessageRequestParams) -> str:
+        """请求内容(去掉 _meta)加模型名的哈希"""
+        payload = params.model_dump_json(exclude={"meta"}, exclude_none=True)
+        return hashlib.sha256(f"{self.model}\n{payload}".encode()).hexdigest()
+
+    async def __call__(
+        self,
+        context: RequestResponder["ClientSession", Any],
+        params: types.CreateMessageRequestParams,
+    ) -> types.CreateMessageResult | types.ErrorData:
+        self.requests += 1
+        try:
+            if self.cache is None:
+                return await self._complete(params)
+            return await self.cache.get_or_load(self.cache_key(params), lambda: self._complete(params))
+        except Exception as e:
+            self.errors += 1
+            return types.ErrorData(code=types.INTERNAL_ERROR, message=f"采样失败: {e}")
+
+    async def _complete(self, params: types.CreateMessageRequestParams) -> types.CreateMessageResult:
+        kwargs = {}
+        if params.temperature is not None:
+            kwargs["temperature"] = params.temperature
+        if params.stopSequences:
+            kwargs["stop"] = params.stopSequences
+        async with self.semaphore:
+            response = await self.llm.chat(
+                model=self.model,
+                messages=to_openai_messages(params),
+                max_tokens=params.maxTokens,
+                **kwargs,
+            )
+        choice = response.choices[0]
+        return types.CreateMessageResult(
+            role="assistant",
+            content=types.TextContent(type="text", text=choice.message.content or ""),
+            model=response.model or self.model,
+            stopReason="maxTokens" if choice.finish_reason == "length" else "endTurn",
+        )
+
+    def stats(self) -> dict:
+        stats = {"requests": self.requests, "errors": self.errors}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+class ConcurrentSamplingSession(ClientSession):
+    """
+    每个采样请求放到会话的任务组中单独处理，不阻塞接收循环
+    SDK 的 sampling_callback 在接收循环中被等待，回调内部无法做到并发，只能在会话的请求分发处把采样请求转到后台任务
+    (sampling_callback 的返回值就是回复内容，SDK 没有让回调提前返回、稍后再回复的公开接口)
+    后台任务中的异常不能进入会话的任务组，否则整个会话会被关闭，统一转换为 ErrorData 回复给服务端
+    SDK 版本不在 SUPPORTED_SDK_VERSIONS 中时不改动内部行为，退回默认的串行处理
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        sdk_version = version("mcp")
+        self.concurrent = sdk_version.startswith(SUPPORTED_SDK_VERSIONS)
+        if not self.concurrent:
+            warnings.warn(
+                f"ConcurrentSamplingSession 未在 mcp {sdk_version} 上验证，采样请求将串行处理",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+
+    async def _received_request(self, responder: RequestResponder[types.ServerRequest, types.ClientResult]):
+        if self.concurrent and isinstance(responder.request.root, types.CreateMessageRequest):
+            self._task_group.start_soon(self._sample, responder)
+            return
+        await super()._received_request(responder)
+
+    async def _sample(self, responder: RequestResponder[types.ServerRequest, types.ClientResult]):
+        try:
+            await super()._received_request(responder)
+        except Exception as e:
+            if responder._completed:
+                return
+            try:
+                with responder:
+                    await responder.respond(types.ErrorData(code=types.INTERNAL_ERROR, message=f"采样失败: {e}"))
+            except Exception:
+                # 连接已经断开，无法回复，会话会自行结束
+                pass
+
+    async def _handle_incoming(self, req):
+        # 采样请求已经转到后台任务处理，接收循环看到它还没有完成，不再交给 message_handler
+        if (
+            self.concurrent
+            and isinstance(req, RequestResponder)
+            and isinstance(req.request.root, types.CreateMessageRequest)
+        ):
+            return
+        await super()._handle_incoming(req)
@@ -0,0 +1,163 @@
+"""
+服务端批量采样
+工具需要很多次生成(每条记录一次、每个分块一次)时，SamplingBatch 以有限并发向客户端发起
+sampling/createMessage 请求，按完成顺序逐个返回结果；单个请求可以设置超时，
+迭代提前结束或工具被取消时，还没完成的请求一并取消；每个请求的耗时都会记录下来，
+用于观察客户端模型的实际吞吐
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from mcp.server.fastmcp import Context
+from mcp.types import CreateMessageResult, SamplingMessage, TextContent
+
+from mcp_common.metrics import percentile
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_TOKENS = 1024
+
+Prompt = Union[str, list[SamplingMessage]]
+
+
+@dataclass
+class SampleResult:
+    index: int  # 在输入中的位置
+    latency: float  # 耗时(秒)
+    result: Optional[CreateMessageResult] = None
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self.result is None or self.result.content.type != "text":
+            return ""
+        return self.result.content.text
+
+
+async def _aiter(prompts: Union[Iterable[Prompt], AsyncIterable[Prompt]]) -> AsyncIterator[Prompt]:
+    if isinstance(prompts, AsyncIterable):
+        async for prompt in prompts:
+            yield prompt
+    else:
+        for prompt in prompts:
+            yield prompt
+
+
+def check_sampling(ctx: Context):
+    """
+    无状态的 Streamable HTTP 每个请求都是新的会话，客户端对采样请求的回复无法送回，
+    采样会一直等到超时，这里提前报错
+    """
+    if ctx.fastmcp.settings.stateless_http:
+        raise RuntimeError("采样需要有状态的会话，服务端运行在无状态模式(MCP_STATELESS=1)下不能使用")
+
+
+class SamplingBatch:
+    def __init__(
+        self,
+        ctx: Context,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: Optional[float] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        system_prompt: Optional[str] = None,
+    ):
+        """
+        :param ctx: 工具的上下文对象，采样请求关联到当前请求发给客户端
+        :param max_concurrency: 同时进行的采样请求数上限
+        :param timeout: 单个采样请求的超时时间(秒)，None 表示不限
+        :param max_tokens: 每次采样生成的 token 上限
+        :param system_prompt: 每次采样使用的系统提示词
+        """
+        check_sampling(ctx)
+        self.ctx = ctx
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self.latencies: list[float] = []
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self._started: Optional[float] = None
+
+    async def _sample(self, index: int, prompt: Prompt) -> SampleResult:
+        if isinstance(prompt, str):
+            prompt = [SamplingMessage(role="user", content=TextContent(type="text", text=prompt))]
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                self.ctx.session.create_message(
+                    messages=prompt,
+                    max_tokens=self.max_tokens,
+                    system_prompt=self.system_prompt,
+                    related_request_id=self.ctx.request_id,
+                ),
+                self.timeout,
+            )
+            item = SampleResult(index=index, latency=time.perf_counter() - start, result=result)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            item = SampleResult(index=index, latency=time.perf_counter() - start, error=f"超时({self.timeout}s)")
+        except Exception as e:
+            self.errors += 1
+            item = SampleResult(index=index, latency=time.perf_counter() - start, error=str(e) or type(e).__name__)
+        self.completed += 1
+        self.latencies.append(item.latency)
+        return item
+
+    async def results(
+        self, prompts: Union[Iterable[Prompt], AsyncIterable[Prompt]]
+    ) -> AsyncIterator[SampleResult]:
+        """
+        按完成顺序逐个返回采样结果，失败或超时的请求通过 SampleResult.error 返回，不会中断整批
+        :param prompts: 提示词(字符串或消息列表)，可以是异步迭代器，按需读取，不会一次全部提交
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        source = _aiter(prompts)
+        pending: dict[asyncio.Task, int] = {}
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        prompt = await anext(source)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending[asyncio.create_task(self._sample(index, prompt))] = index
+                    index += 1
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.pop(task)
+                    yield task.result()
+        finally:
+            # 调用方提前结束迭代或被取消时，取消还在进行的采样请求
+            for task in pending:
+                task.cancel()
+
+    async def gather(self, prompts: Union[Iterable[Prompt], AsyncIterable[Prompt]]) -> list[SampleResult]:
+        """等待全部完成，按输入顺序返回"""
+        items = [item async for item in self.results(prompts)]
+        return sorted(items, key=lambda item: item.index)
+
+    def stats(self) -> dict:
+        """返回完成数、失败数、超时数、吞吐(个/秒)以及单个请求的耗时统计(秒)"""
+        latencies = sorted(self.latencies)
+
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        return {
+            "completed": self.completed,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "throughput": self.completed / elapsed if elapsed else 0.0,
+            "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "max": latencies[-1] if latencies else 0.0,
+        }
@@ -0,0 +1,299 @@
+"""
+网络服务的启动方式
+run_server 按环境变量选择传输方式，默认仍是 SSE；使用 Streamable HTTP 时可以在同一个端口上运行多个 worker 进程：
+- 无状态模式(MCP_STATELESS=1)：每个请求单独处理，不保留会话，所有 worker 共享监听端口，由内核分配连接；
+  进度和日志通知随请求的响应流返回，仍然可用；采样需要客户端通过新的请求回复，无状态模式下不可用，
+  logging/setLevel 也不会在请求之间保留(使用 LOG_DEFAULT_LEVEL)
+- 有状态模式：会话保存在创建它的 worker 中，主进程作为前置代理，按 mcp-session-id 把同一会话的请求
+  转发到同一个 worker，进度、日志、采样都可以使用
+SSE 的会话同样绑定在单个进程上，只支持一个 worker
+worker 通过 fork 创建，继承已经注册好工具的 app，只支持类 Unix 系统
+监听非本机地址时，DNS 重绑定防护允许的 Host 由 MCP_ALLOWED_HOSTS 指定，未指定时关闭防护
+"""
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from typing import Optional
+
+import httpx
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
+from mcp.types import INTERNAL_ERROR, INVALID_REQUEST
+
+from mcp_common.cache import TTLCache
+
+TRANSPORTS = ["stdio", "sse", "streamable-http"]
+# 不转发的逐跳头部
+HOP_BY_HOP = {b"connection", b"keep-alive", b"transfer-encoding", b"upgrade", b"te", b"trailer"}
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+# 代理记录的会话数上限，以及会话空闲多久(秒)后不再记录
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_SESSION_TTL = 3600.0
+
+
+def _flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def _split(name: str) -> list[str]:
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+def _transport_security(host: str) -> Optional[TransportSecuritySettings]:
+    """
+    监听地址对应的 DNS 重绑定防护配置
+    FastMCP 创建时按默认的 127.0.0.1 只允许本机的 Host，改为监听其他地址后负载均衡转发的请求都会被拒绝(421)
+    :param host: 监听地址
+    :return: 防护配置，None 表示不做 Host / Origin 校验
+    """
+    allowed_hosts = _split("MCP_ALLOWED_HOSTS")
+    if not allowed_hosts:
+        print(f"监听 {host} 且未设置 MCP_ALLOWED_HOSTS，已关闭 DNS 重绑定防护", file=sys.stderr)
+        return None
+    # 未指定 Origin 时允许与 Host 同源的页面
+    allowed_origins = _split("MCP_ALLOWED_ORIGINS") or [
+        f"{scheme}://{allowed}" for allowed in allowed_hosts for scheme in ("http", "https")
+    ]
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=allowed_hosts,
+        allowed_origins=allowed_origins,
+    )
+
+
+def run_server(app: FastMCP, transport: str = "sse"):
+    """
+    按环境变量配置并启动服务
+    MCP_TRANSPORT: 传输方式(stdio / sse / streamable-http)，默认使用 transport 参数
+    MCP_HOST / MCP_PORT: 监听地址，默认 127.0.0.1:8000
+    MCP_ALLOWED_HOSTS: 监听非本机地址时允许的 Host 头，逗号分隔，支持 example.com:* 形式的任意端口
+    MCP_ALLOWED_ORIGINS: 允许的 Origin 头，默认与 MCP_ALLOWED_HOSTS 同源
+    MCP_STATELESS: 为 1 时 Streamable HTTP 使用无状态模式
+    MCP_WORKERS: Streamable HTTP 的 worker 进程数，默认 1
+    MCP_MAX_SESSIONS / MCP_SESSION_TTL: 有状态多 worker 时代理记录的会话数上限和空闲过期时间(秒)
+    """
+    transport = os.getenv("MCP_TRANSPORT", transport)
+    if transport not in TRANSPORTS:
+        raise ValueError(f"不支持的传输方式: {transport}，可选 {', '.join(TRANSPORTS)}")
+    host = os.getenv("MCP_HOST", app.settings.host)
+    if host != app.settings.host and host not in LOOPBACK_HOSTS:
+        # 必须在创建 SSE / Streamable HTTP 应用之前替换，应用创建时读取这份配置
+        app.settings.transport_security = _transport_security(host)
+    app.settings.host = host
+    app.settings.port = int(os.getenv("MCP_PORT", str(app.settings.port)))
+    app.settings.stateless_http = _flag("MCP_STATELESS", app.settings.stateless_http)
+    workers = int(os.getenv("MCP_WORKERS", "1"))
+    if workers <= 1:
+        app.run(transport=transport)
+        return
+    if transport != "streamable-http":
+        raise ValueError(f"{transport} 的会话绑定在单个进程上，多个 worker 只支持 streamable-http")
+    serve_workers(app, workers)
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    # 按地址解析出协议族，IPv6 地址(如 ::1)需要 AF_INET6 的 socket
+    family, kind, proto, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    sock = socket.socket(family, kind, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(address)
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(asgi_app, sock: socket.socket, log_level: str):
+    uvicorn.Server(uvicorn.Config(asgi_app, log_level=log_level)).run(sockets=[sock])
+
+
+def _exit_on_signal(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def serve_workers(app: FastMCP, workers: int):
+    """
+    启动 workers 个 Streamable HTTP worker 进程
+    无状态模式下 worker 直接共享监听端口；有状态模式下 worker 监听本机随机端口，主进程运行会话亲和代理
+    """
+    context = multiprocessing.get_context("fork")
+    asgi_app = app.streamable_http_app()
+    log_level = app.settings.log_level.lower()
+    host, port = app.settings.host, app.settings.port
+
+    if app.settings.stateless_http:
+        sockets = [_listen(host, port)] * workers
+    else:
+        sockets = [_listen("127.0.0.1", 0) for _ in range(workers)]
+    processes = [
+        context.Process(target=_run_worker, args=(asgi_app, sock, log_level), daemon=True) for sock in sockets
+    ]
+    for process in processes:
+        process.start()
+    upstreams = [f"http://127.0.0.1:{sock.getsockname()[1]}" for sock in sockets]
+    # 监听 socket 已由 worker 继承，主进程关闭自己的副本，worker 退出后连接它的端口会立即失败，而不是一直排队
+    for sock in set(sockets):
+        sock.close()
+    # SIGTERM 默认直接结束进程，不会执行 finally，worker 会成为孤儿进程
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    try:
+        if app.settings.stateless_http:
+            for process in processes:
+                process.join()
+        else:
+            proxy = SessionAffinityProxy(
+                upstreams,
+                max_sessions=int(os.getenv("MCP_MAX_SESSIONS", str(DEFAULT_MAX_SESSIONS))),
+                session_ttl=float(os.getenv("MCP_SESSION_TTL", str(DEFAULT_SESSION_TTL))),
+            )
+            uvicorn.run(proxy, host=host, port=port, log_level=log_level)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+class SessionAffinityProxy:
+    """
+    会话亲和的前置代理(ASGI)
+    没有 mcp-session-id 的请求(initialize)轮询分配给 worker，并记录响应中返回的会话 id 属于哪个 worker；
+    之后带有该会话 id 的请求都转发到同一个 worker，响应按流转发，支持 SSE 长连接
+    客户端不发送 DELETE 就离开的会话不会被通知到代理，会话记录按空闲时间过期、超出上限时淘汰最久未使用的，
+    过期会话的请求返回 404，客户端重新初始化
+    """
+
+    def __init__(
+        self,
+        upstreams: list[str],
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        session_ttl: Optional[float] = DEFAULT_SESSION_TTL,
+    ):
+        """
+        :param upstreams: worker 地址，如 http://127.0.0.1:9001
+        :param max_sessions: 记录的会话数上限
+        :param session_ttl: 会话空闲多久(秒)后过期，None 表示不过期
+        """
+        self.upstreams = upstreams
+        self.sessions = TTLCache(maxsize=max_sessions, ttl=session_ttl)  # 会话 id -> worker 序号
+        self._next = itertools.cycle(range(len(upstreams)))
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._proxy(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # SSE 响应是长连接，不设置超时
+                self.client = httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=None))
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _proxy(self, scope, receive, send):
+        headers = [(name, value) for name, value in scope["headers"] if name not in HOP_BY_HOP]
+        session_id = next((value.decode() for name, value in headers if name == b"mcp-session-id"), None)
+        if session_id is None:
+            index = next(self._next)
+        else:
+            index = self.sessions.get(session_id)
+            if index is None:
+                await _send_error(send, 404, "Session not found")
+                return
+            # 每次请求都重新计算空闲时间
+            self.sessions.set(session_id, index)
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        url = self.upstreams[index] + scope["raw_path"].decode()
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode()
+        request = self.client.build_request(scope["method"], url, headers=headers, content=bytes(body))
+        try:
+            response = await self.client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            # worker 已退出，它保存的会话都不存在了，返回 404 让客户端重新初始化；
+            # 同一个 worker 的其他会话在各自下次请求时同样删除，或者空闲过期
+            if session_id is not None:
+                self.sessions.pop(session_id)
+                await _send_error(send, 404, f"Session not found: worker {index} 不可用")
+            else:
+                await _send_error(send, 502, f"worker {index} 不可用: {e}")
+            return
+        try:
+            created = response.headers.get("mcp-session-id")
+            if created and response.status_code < 400:
+                self.sessions.set(created, index)
+            if session_id and (response.status_code == 404 or (scope["method"] == "DELETE" and response.status_code < 400)):
+                # 会话已结束或在 worker 中过期
+                self.sessions.pop(session_id, None)
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(name, value) for name, value in response.headers.raw if name.lower() not in HOP_BY_HOP],
+            })
+            await _stream_body(response, receive, send)
+        finally:
+            await response.aclose()
+
+
+async def _stream_body(response: httpx.Response, receive, send):
+    """转发响应体，客户端断开时停止读取 worker 的响应(关闭 SSE 流)"""
+
+    async def forward():
+        async for chunk in response.aiter_raw():
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(disconnected())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _send_error(send, status: int, message: str):
+    body = json.dumps({
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {"code": INVALID_REQUEST if status == 404 else INTERNAL_ERROR, "message": message},
+    }, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
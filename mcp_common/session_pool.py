@@ -0,0 +1,216 @@
+"""
+stdio MCP 服务端进程池
+每次 run() 都重新启动 python 解释器、导入依赖并完成 initialize 握手代价很高，
+这里为同一个服务端脚本预热 N 个已初始化的 ClientSession，按需租借给调用方，
+空闲超时后用 ping 做健康检查，达到最大请求数后回收，进程崩溃后自动重启
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_REQUESTS = 100  # 单个会话处理多少次租借后回收重启
+DEFAULT_PING_INTERVAL = 30.0  # 空闲超过该时间(秒)后租借前先 ping
+DEFAULT_PING_TIMEOUT = 5.0
+
+
+class _PooledSession:
+    """
+    池中的一个槽位
+    stdio_client/ClientSession 基于 anyio，进入和退出必须在同一个任务中，
+    所以每个会话由一个独立任务持有，通过事件通知其退出
+    """
+
+    def __init__(self, server_parameters: StdioServerParameters):
+        self.server_parameters = server_parameters
+        self.session: Optional[ClientSession] = None
+        self.requests = 0  # 当前进程已处理的租借次数
+        self.last_used = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def _hold(self):
+        try:
+            async with stdio_client(self.server_parameters) as (read_stream, write_stream):
+                # 经过一层转发读取服务端输出，进程崩溃时 stdout 关闭，转发结束后立即把槽位标记为不可用
+                forward_writer, forward_reader = anyio.create_memory_object_stream(0)
+                async with anyio.create_task_group() as task_group:
+                    task_group.start_soon(self._forward, read_stream, forward_writer)
+                    async with ClientSession(forward_reader, write_stream) as session:
+                        await session.initialize()
+                        self.session = session
+                        self._ready.set()
+                        await self._stop.wait()
+                    task_group.cancel_scope.cancel()
+        except Exception as err:
+            self._error = err
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def _forward(self, source, sink):
+        async with sink:
+            async for message in source:
+                await sink.send(message)
+        # 服务端进程已经退出
+        self.session = None
+        self._stop.set()
+
+    async def start(self):
+        self.requests = 0
+        self._error = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._hold())
+        await self._ready.wait()
+        if self.session is None:
+            raise RuntimeError(f"MCP 服务端启动失败:{self._error}")
+        self.last_used = time.monotonic()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=DEFAULT_PING_TIMEOUT)
+        except Exception:
+            self._task.cancel()
+        self._task = None
+        self.session = None
+
+
+class StdioSessionPool:
+    def __init__(
+        self,
+        server_path: str,
+        size: int = DEFAULT_POOL_SIZE,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        ping_interval: float = DEFAULT_PING_INTERVAL,
+        ping_timeout: float = DEFAULT_PING_TIMEOUT,
+        command: str = "python",
+        env: Optional[dict[str, str]] = None,
+    ):
+        """
+        :param server_path: 服务端脚本路径
+        :param size: 常驻的会话(进程)数量
+        :param max_requests: 单个会话最多租借次数，超过后重启进程
+        :param ping_interval: 空闲超过该时间(秒)的会话在租借前先 ping 检查
+        :param ping_timeout: ping 超时时间(秒)
+        :param command: 启动服务端的命令
+        :param env: 额外传给服务端进程的环境变量，默认只继承 PATH、HOME 等少数变量
+        """
+        self.server_parameters = StdioServerParameters(command=command, args=[server_path], env=env)
+        self.size = size
+        self.max_requests = max_requests
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self._slots = [_PooledSession(self.server_parameters) for _ in range(size)]
+        self._idle: asyncio.Queue[_PooledSession] = asyncio.Queue()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self.leases = 0  # 租借次数
+        self.spawns = 0  # 启动进程次数(含重启)
+        self.recycles = 0  # 达到 max_requests 后回收的次数
+        self.failures = 0  # 健康检查失败或调用中断后重启的次数
+
+    async def start(self):
+        """并发启动所有会话，重复调用无副作用"""
+        async with self._start_lock:
+            if self._started:
+                return
+            results = await asyncio.gather(
+                *(slot.start() for slot in self._slots), return_exceptions=True
+            )
+            for slot, result in zip(self._slots, results):
+                if not isinstance(result, BaseException):
+                    self.spawns += 1
+                # 启动失败的槽位同样放回队列，租借时再重启
+                self._idle.put_nowait(slot)
+            self._started = True
+
+    async def _healthy(self, slot: _PooledSession) -> bool:
+        if not slot.alive:
+            return False
+        if time.monotonic() - slot.last_used < self.ping_interval:
+            return True
+        try:
+            await slot.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def _ensure(self, slot: _PooledSession):
+        """保证槽位中的会话可用，否则重启进程"""
+        if slot.alive and slot.requests >= self.max_requests:
+            self.recycles += 1
+            await slot.stop()
+        elif slot.alive:
+            try:
+                healthy = await asyncio.wait_for(self._healthy(slot), self.ping_timeout)
+            except asyncio.TimeoutError:
+                healthy = False
+            if healthy:
+                return
+            self.failures += 1
+            await slot.stop()
+        elif slot._task is not None:
+            # 进程已经崩溃(或上次启动失败)，不必等空闲 ping 才发现
+            self.failures += 1
+            await slot.stop()
+        await slot.start()
+        self.spawns += 1
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        租借一个已初始化的会话
+        async with pool.lease() as session:
+            await session.call_tool(...)
+        """
+        if not self._started:
+            await self.start()
+        slot = await self._idle.get()
+        try:
+            await self._ensure(slot)
+        except Exception:
+            self._idle.put_nowait(slot)
+            raise
+        self.leases += 1
+        try:
+            yield slot.session
+        except Exception:
+            # 调用过程中出错，进程可能已经崩溃，下次租借前强制 ping
+            slot.last_used = 0.0
+            raise
+        else:
+            slot.last_used = time.monotonic()
+        finally:
+            slot.requests += 1
+            self._idle.put_nowait(slot)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "alive": sum(slot.alive for slot in self._slots),
+            "leases": self.leases,
+            "spawns": self.spawns,
+            "recycles": self.recycles,
+            "failures": self.failures,
+        }
+
+    async def aclose(self):
+        await asyncio.gather(*(slot.stop() for slot in self._slots))
+        self._started = False
+        self._idle = asyncio.Queue()
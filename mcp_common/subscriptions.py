@@ -0,0 +1,35 @@
+"""
+资源订阅的能力声明
+底层 Server 即使注册了 resources/subscribe 处理函数，能力声明中也固定为 subscribe=False，
+客户端按能力声明判断，不会发起订阅；enable_subscriptions 注册处理函数并打开该能力
+"""
+from collections.abc import Awaitable, Callable
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import AnyUrl
+
+
+def enable_subscriptions(
+    app: FastMCP,
+    subscribe: Callable[[AnyUrl], Awaitable[None]],
+    unsubscribe: Callable[[AnyUrl], Awaitable[None]],
+):
+    """
+    为 FastMCP 注册资源订阅/取消订阅的处理函数，并在能力声明中打开 resources.subscribe
+    能力声明由底层 Server 的 get_capabilities 生成，SDK 没有提供设置 subscribe 的参数，只能在这里包装它
+    :param app: FastMCP 实例
+    :param subscribe: 处理 resources/subscribe，参数为资源 URI
+    :param unsubscribe: 处理 resources/unsubscribe，参数为资源 URI
+    """
+    server = app._mcp_server
+    server.subscribe_resource()(subscribe)
+    server.unsubscribe_resource()(unsubscribe)
+    get_capabilities = server.get_capabilities
+
+    def get_capabilities_with_subscribe(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+    server.get_capabilities = get_capabilities_with_subscribe
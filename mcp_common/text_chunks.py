@@ -0,0 +1,98 @@
+"""
+长文本切块
+按估算的 token 数把文本切成不超过上限的块，尽量在段落/句子边界处断开；
+iter_file_chunks 边读文件边切块，大文件不需要整个读进内存
+"""
+import re
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+import aiofiles
+
+READ_SIZE = 64 * 1024  # 每次从文件读取的字符数
+# 优先在段落处断开，其次是句末标点，最后才按长度硬切
+_BREAKS = [re.compile(r"\n\s*\n"), re.compile(r"[\n。！？；.!?;]")]
+
+
+def estimate_text_tokens(text: str) -> int:
+    """粗略估算 token 数：英文约 4 个字符一个 token，中文约一字一个 token"""
+    cjk = sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_point(text: str, max_tokens: int) -> int:
+    """返回 text 中不超过 max_tokens 的最长前缀的结束位置，尽量落在自然边界上"""
+    # 每个字符至少 1/4 个 token、至多 1 个 token，先二分出按长度能容纳的位置
+    low, high = max_tokens, min(len(text), max_tokens * 4)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_text_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    limit = max(low, 1)
+    for pattern in _BREAKS:
+        ends = [match.end() for match in pattern.finditer(text, 0, limit)]
+        # 断点太靠前会产生很多碎块，只接受后半段的断点
+        if ends and ends[-1] >= limit // 2:
+            return ends[-1]
+    return limit
+
+
+def _pack(buffer: str, max_tokens: int, final: bool = False) -> tuple[list[str], str]:
+    """
+    从缓冲区切出超过上限部分的完整块，split_text 和 iter_file_chunks 共用
+    :param buffer: 已到达但还没切出的文本
+    :param max_tokens: 每块的 token 上限
+    :param final: 为 True 时输入已经结束，剩余不足一块的部分也作为最后一块返回
+    :return: (切出的块, 留到和后续内容一起切的剩余部分)
+    """
+    chunks = []
+    # 缓冲区超过上限才切，最后不足一块的部分留到和后续内容一起切
+    while estimate_text_tokens(buffer) > max_tokens:
+        end = _split_point(buffer, max_tokens)
+        chunk = buffer[:end].strip()
+        buffer = buffer[end:]
+        if chunk:
+            chunks.append(chunk)
+    if final:
+        if buffer.strip():
+            chunks.append(buffer.strip())
+        buffer = ""
+    return chunks, buffer
+
+
+def split_text(pieces: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """
+    把依次到达的文本片段切成不超过 max_tokens 的块
+    :param pieces: 文本片段，如逐次读取的文件内容
+    :param max_tokens: 每块的 token 上限
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens 必须大于 0")
+    buffer = ""
+    for piece in pieces:
+        chunks, buffer = _pack(buffer + piece, max_tokens)
+        yield from chunks
+    yield from _pack(buffer, max_tokens, final=True)[0]
+
+
+async def iter_file_chunks(path: str, max_tokens: int, encoding: str = "utf-8") -> AsyncIterator[str]:
+    """
+    边读文件边切块，切块方式与 split_text 相同
+    :param path: 文件路径
+    :param max_tokens: 每块的 token 上限
+    :param encoding: 文件编码
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens 必须大于 0")
+    buffer = ""
+    async with aiofiles.open(path, mode="r", encoding=encoding) as fp:
+        while True:
+            piece = await fp.read(READ_SIZE)
+            if not piece:
+                break
+            chunks, buffer = _pack(buffer + piece, max_tokens)
+            for chunk in chunks:
+                yield chunk
+    for chunk in _pack(buffer, max_tokens, final=True)[0]:
+        yield chunk
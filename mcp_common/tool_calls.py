@@ -0,0 +1,86 @@
+"""
+并发执行 LLM 返回的 tool_calls
+多个工具调用复用同一个 ClientSession，通过信号量限制并发数，每个调用单独超时，
+返回的 role=tool 消息顺序与 tool_calls 原始顺序一致
+"""
+import asyncio
+import json
+from datetime import timedelta
+from typing import Any, Optional
+
+from mcp import ClientSession
+from mcp.types import CallToolResult
+
+from mcp_common.result_cache import ToolResultCache
+
+DEFAULT_MAX_CONCURRENCY = 8  # 同时在途的工具调用上限
+DEFAULT_CALL_TIMEOUT = 30.0  # 单个工具调用超时时间(秒)
+
+
+def result_text(result: CallToolResult) -> str:
+    """把工具返回的所有文本内容拼接成一个字符串"""
+    return "\n".join(
+        content.text for content in result.content if getattr(content, "text", None)
+    )
+
+
+async def call_tool(
+    session: ClientSession,
+    tool_call_id: str,
+    name: str,
+    arguments: str,
+    timeout: float = DEFAULT_CALL_TIMEOUT,
+    cache: Optional[ToolResultCache] = None,
+) -> dict:
+    """
+    调用单个工具并包装成 role=tool 消息
+    :param tool_call_id: LLM 返回的 tool_call_id
+    :param name: 工具名称
+    :param arguments: LLM 生成的 JSON 参数字符串
+    :param timeout: 超时时间(秒)
+    :param cache: 工具结果缓存，只读/幂等的工具命中时不再请求服务端
+    """
+    try:
+        kwargs = {
+            "name": name,
+            "arguments": json.loads(arguments or "{}"),
+            "read_timeout_seconds": timedelta(seconds=timeout),
+        }
+        if cache is None:
+            result = await session.call_tool(**kwargs)
+        else:
+            result = await cache.call(session, **kwargs)
+        content = result_text(result)
+    except Exception as err:
+        # 单个工具失败不影响其他工具，把错误信息交给 LLM 处理
+        content = f"工具 {name} 调用异常:{err}"
+    return {"role": "tool", "content": content, "tool_call_id": tool_call_id}
+
+
+async def call_tools(
+    session: ClientSession,
+    tool_calls: list[Any],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    timeout: float = DEFAULT_CALL_TIMEOUT,
+    cache: Optional[ToolResultCache] = None,
+) -> list[dict]:
+    """
+    并发调用 LLM 选择的所有工具
+    :param session: 已初始化的 MCP 客户端会话
+    :param tool_calls: choice.message.tool_calls
+    :param max_concurrency: 最大并发数
+    :param timeout: 单个工具调用的超时时间(秒)
+    :param cache: 工具结果缓存
+    :return: 按 tool_calls 顺序排列的 role=tool 消息列表
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call_one(tool_call) -> dict:
+        function = tool_call.function
+        async with semaphore:
+            return await call_tool(
+                session, tool_call.id, function.name, function.arguments, timeout, cache
+            )
+
+    # gather 按传入顺序返回结果，保证 tool_call_id 顺序不变
+    return list(await asyncio.gather(*(call_one(tool_call) for tool_call in tool_calls)))
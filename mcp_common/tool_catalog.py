@@ -0,0 +1,104 @@
+"""
+会话级工具目录
+initialize() 之后只拉取一次 tools/list，并缓存转换好的 Function Calling 定义，
+只有服务端发送 notifications/tools/list_changed 或超过 TTL 时才重新拉取
+"""
+import asyncio
+import time
+from typing import Optional
+
+from mcp import ClientSession
+from mcp.types import ServerNotification, Tool, ToolListChangedNotification
+
+from mcp_common.pagination import iter_tools
+from mcp_common.result_cache import ToolResultCache
+
+
+def tool_to_function(tool: Tool) -> dict:
+    """把 MCP 工具定义转换为 OpenAI Function Calling 格式"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,  # 工具名称
+            "description": tool.description,  # 工具描述
+            "parameters": tool.inputSchema,  # 输入参数格式
+        },
+    }
+
+
+class ToolCatalog:
+    def __init__(self, ttl: Optional[float] = None, result_cache: Optional[ToolResultCache] = None):
+        """
+        :param ttl: 缓存有效期(秒)，None 表示只依赖 list_changed 通知失效
+        :param result_cache: 工具结果缓存，每次拉取工具列表后按注解更新可缓存的工具
+        """
+        self.ttl = ttl
+        self.result_cache = result_cache
+        self.session: Optional[ClientSession] = None
+        self._tools: Optional[list[Tool]] = None
+        self._functions: Optional[list[dict]] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0  # 命中缓存次数
+        self.misses = 0  # 重新拉取次数
+
+    def bind(self, session: ClientSession):
+        """绑定已初始化的会话，旧缓存一并作废"""
+        self.session = session
+        self.invalidate()
+
+    def invalidate(self):
+        self._tools = None
+        self._functions = None
+        if self.result_cache is not None:
+            # 工具定义可能已经变化，不再使用旧的调用结果
+            self.result_cache.cache.clear()
+
+    async def message_handler(self, message):
+        """作为 ClientSession 的 message_handler，收到 list_changed 通知时使缓存失效"""
+        if isinstance(message, ServerNotification) and isinstance(
+            message.root, ToolListChangedNotification
+        ):
+            self.invalidate()
+
+    def _expired(self) -> bool:
+        if self._tools is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._fetched_at > self.ttl
+
+    async def _refresh(self):
+        tools = [tool async for tool in iter_tools(self.session)]
+        self._tools = tools
+        self._functions = [tool_to_function(tool) for tool in tools]
+        self._fetched_at = time.monotonic()
+        if self.result_cache is not None:
+            self.result_cache.update(self.session, tools)
+
+    async def _ensure(self):
+        if not self._expired():
+            self.hits += 1
+            return
+        # 并发查询同时未命中时只拉取一次
+        async with self._lock:
+            if self._expired():
+                self.misses += 1
+                await self._refresh()
+            else:
+                self.hits += 1
+
+    async def tools(self) -> list[Tool]:
+        """返回 MCP 工具列表"""
+        await self._ensure()
+        return self._tools
+
+    async def functions(self) -> list[dict]:
+        """返回 Function Calling 格式的工具列表"""
+        await self._ensure()
+        return self._functions
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tools": len(self._tools) if self._tools is not None else 0,
+        }
@@ -0,0 +1,147 @@
+"""
+工具检索索引
+用工具名、描述和参数名建立 BM25 倒排索引，每次查询只挑出最相关的 top-k 个工具发给 LLM，
+工具很多(多个服务端聚合)时可以显著减少 prompt 中工具定义占用的 token；
+工具列表变化时只对新增/修改/删除的工具增量更新索引
+"""
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from mcp_common.text_chunks import estimate_text_tokens
+
+DEFAULT_TOP_K = 8
+NAME_BOOST = 2  # 工具名中的词比描述中的词更能说明用途，按重复次数加权
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+|[\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    英文按单词切分(拆开 snake_case 和 camelCase)并转小写，
+    中文没有分词器，切成单字加相邻二字，兼顾召回和区分度
+    """
+    tokens = []
+    for word in _WORD.findall(text or ""):
+        if "\u4e00" <= word[0] <= "\u9fff":
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def estimate_tokens(functions: list[dict]) -> int:
+    """粗略估算工具定义占用的 token 数：英文约 4 个字符一个 token，中文约一字一个 token"""
+    return estimate_text_tokens(json.dumps(functions, ensure_ascii=False))
+
+
+@dataclass
+class _Doc:
+    fingerprint: str
+    function: dict
+    terms: Counter
+    length: int
+
+
+class ToolIndex:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        :param k1: BM25 词频饱和参数
+        :param b: BM25 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[str, _Doc] = {}  # 工具名 -> 文档
+        self._postings: dict[str, dict[str, int]] = {}  # 倒排表：词 -> {工具名: 词频}
+        self._total_length = 0
+        self._source = None  # 上次 update 的工具列表，同一个列表对象直接跳过
+        self.rebuilt = 0  # 累计重新索引的工具数
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _document(function: dict) -> list[str]:
+        spec = function["function"]
+        terms = tokenize(spec["name"]) * NAME_BOOST + tokenize(spec.get("description") or "")
+        properties = (spec.get("parameters") or {}).get("properties") or {}
+        for name, schema in properties.items():
+            terms += tokenize(name)
+            if isinstance(schema, dict):
+                terms += tokenize(schema.get("description") or "")
+        return terms
+
+    def _add(self, name: str, fingerprint: str, function: dict):
+        terms = Counter(self._document(function))
+        self._docs[name] = _Doc(fingerprint, function, terms, sum(terms.values()))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[name] = tf
+        self._total_length += self._docs[name].length
+        self.rebuilt += 1
+
+    def _remove(self, name: str):
+        doc = self._docs.pop(name)
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[name]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= doc.length
+
+    def update(self, functions: list[dict]):
+        """
+        用最新的 Function Calling 工具列表更新索引，只处理有变化的工具
+        :param functions: tool_to_function 转换后的工具列表
+        """
+        if functions is self._source:
+            return
+        latest = {}
+        for function in functions:
+            fingerprint = hashlib.sha1(
+                json.dumps(function, sort_keys=True, ensure_ascii=False).encode()
+            ).hexdigest()
+            latest[function["function"]["name"]] = (fingerprint, function)
+
+        for name in [name for name in self._docs if name not in latest]:
+            self._remove(name)
+        for name, (fingerprint, function) in latest.items():
+            doc = self._docs.get(name)
+            if doc is not None and doc.fingerprint == fingerprint:
+                doc.function = function
+                continue
+            if doc is not None:
+                self._remove(name)
+            self._add(name, fingerprint, function)
+        self._source = functions
+
+    def scores(self, query: str) -> dict[str, float]:
+        """返回与查询至少有一个共同词的工具的 BM25 得分"""
+        if not self._docs:
+            return {}
+        count = len(self._docs)
+        avg_length = self._total_length / count or 1
+        result: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for name, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._docs[name].length / avg_length)
+                result[name] = result.get(name, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return result
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K) -> list[dict]:
+        """
+        返回与查询最相关的至多 k 个工具(Function Calling 格式)，没有任何匹配时返回空列表
+        :param query: 用户查询
+        :param k: 返回的工具数
+        """
+        scores = self.scores(query)
+        names = sorted(scores, key=lambda name: (-scores[name], name))[:k]
+        return [self._docs[name].function for name in names]
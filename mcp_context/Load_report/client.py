@@ -21,6 +21,10 @@ async def message_handler(
     print("*" * 30)
 
 
+async def progress_handler(progress: float, total: float | None, message: str | None):
+    print(f"进度: {progress}/{total} {message or ''}")
+
+
 async def run():
     async with sse_client("http://127.0.0.1:8000/sse") as (read_stream, write_stream):
         async with ClientSession(
@@ -31,8 +35,11 @@ async def run():
             tools = (await session.list_tools()).tools
             # print(tools)
             tool = tools[0]
+            # 传入 progress_callback 时请求会带上 progressToken，服务端据此发送进度通知
             response = await session.call_tool(
-                name=tool.name, arguments={"files": ["a.txt", "b.txt"]}
+                name=tool.name,
+                arguments={"files": ["a.txt", "b.txt"]},
+                progress_callback=progress_handler,
             )
             # print(response)
 
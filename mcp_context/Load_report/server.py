@@ -1,35 +1,164 @@
 import asyncio
+import hashlib
+import os
+import sys
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
 from mcp.server.fastmcp import FastMCP, Context
-from mcp.types import RequestParams
 
-mcp: FastMCP = FastMCP()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcp_common.progress import ProgressReporter
+from mcp_common.serving import run_server
+
+# 线程池处理 I/O 密集的任务，进程池处理 CPU 密集的任务
+worker_threads = int(os.getenv("WORKER_THREADS", "16"))
+worker_processes = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+# 进度通知的时间间隔(毫秒)和进度步长(百分比)，满足任意一个就发送
+progress_interval_ms = int(os.getenv("PROGRESS_INTERVAL_MS", "500"))
+progress_min_percent = float(os.getenv("PROGRESS_MIN_PERCENT", "1"))
+# 结果中最多列出的失败文件数
+max_reported_errors = 20
+
+_thread_pool: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+_pool_users = 0  # 正在使用工作池的会话数
+
+
+@asynccontextmanager
+async def worker_pools(server: FastMCP) -> AsyncIterator[None]:
+    """
+    工作池的生命周期
+    FastMCP 的 lifespan 在每个会话开始时进入(无状态模式下是每个请求)，工作池按引用计数在会话之间共享：
+    第一个会话创建，最后一个会话结束时关闭，工作进程不会在服务退出后残留
+    创建执行器本身不启动进程/线程，第一次提交任务时才启动
+    """
+    global _thread_pool, _process_pool, _pool_users
+    if _pool_users == 0:
+        _thread_pool = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="log_tool")
+        _process_pool = ProcessPoolExecutor(max_workers=worker_processes)
+    _pool_users += 1
+    try:
+        yield
+    finally:
+        _pool_users -= 1
+        if _pool_users == 0:
+            thread_pool, process_pool = _thread_pool, _process_pool
+            _thread_pool = _process_pool = None
+            # 不阻塞事件循环：取消排队的任务，正在执行的任务完成后工作进程退出
+            thread_pool.shutdown(wait=False, cancel_futures=True)
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+mcp: FastMCP = FastMCP(lifespan=worker_pools)
+
+
+def get_executor(cpu_bound: bool) -> Executor:
+    """进程内共享的工作池，由 worker_pools 创建"""
+    return _process_pool if cpu_bound else _thread_pool
+
+
+def read_file(path: str) -> dict:
+    """I/O 密集：统计文件字节数和行数"""
+    size = 0
+    lines = 0
+    with open(path, mode="rb") as fp:
+        for block in iter(lambda: fp.read(1024 * 1024), b""):
+            size += len(block)
+            lines += block.count(b"\n")
+    return {"bytes": size, "lines": lines}
+
+
+def analyze_file(path: str) -> dict:
+    """CPU 密集：计算文件摘要并统计各级别日志的行数"""
+    digest = hashlib.sha256()
+    levels = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+    size = 0
+    lines = 0
+    with open(path, mode="rb") as fp:
+        for line in fp:
+            size += len(line)
+            lines += 1
+            digest.update(line)
+            for level in levels:
+                if level.encode() in line:
+                    levels[level] += 1
+                    break
+    return {"bytes": size, "lines": lines, "sha256": digest.hexdigest(), "levels": levels}
 
 
 @mcp.tool()
-async def log_tool(files: list[str], ctx: Context):
+async def log_tool(files: list[str], ctx: Context, cpu_bound: bool = False):
     """
     日志输出
-    处理多个文件进行进度汇报
+    并行处理多个文件并汇报进度
     :param files: 多个文件路径
     :param ctx: 上下文对象，无需客户端传递
-    :return: 处理结果
+    :param cpu_bound: 为 True 时在进程池中做摘要和日志级别统计，否则在线程池中统计大小和行数
+    :return: 处理结果汇总
     """
-    for index, file in enumerate(files):
-        await asyncio.sleep(1)
-        """
-        查看ctx.report_progress()函数文档，这个函数有一个progress_token参数
-        progress_token = self.request_context.meta.progressToken if self.request_context.meta else None
-        if progress_token is None: return
-        如果这个参数的赋值为None，调用函数直接返回为空，相当于函数不会发送消息
-        要求函数发送消息，则要求progress_token参数不能为None
-        self.request_context.meta不为None，返回self.request_context.meta.progressToken
-        ProgressToken = str | int 需要指定为字符串或整型数据避免None
-        这里使用每一个请求的id
-        """
-        ctx.request_context.meta = RequestParams.Meta(progressToken=ctx.request_id)
-        await ctx.report_progress(index, len(files))
-    return "处理完毕"
+    # ctx.report_progress() 使用客户端在请求中带上的 progressToken：
+    # progress_token = self.request_context.meta.progressToken if self.request_context.meta else None
+    # 客户端调用 call_tool 时传入 progress_callback 才会带上 progressToken，没有带时不发送进度通知，
+    # 不能用请求 id 之类的值覆盖 ctx.request_context.meta，否则客户端无法把通知和请求对应起来
+    loop = asyncio.get_running_loop()
+    executor = get_executor(cpu_bound)
+    work = analyze_file if cpu_bound else read_file
+    # 通知合并：距上次通知超过 progress_interval_ms 或进度前进了 progress_min_percent 时才发送
+    progress = ProgressReporter(
+        ctx,
+        total=len(files),
+        interval=progress_interval_ms / 1000,
+        min_step=progress_min_percent / 100,
+    )
+    summary = {"files": len(files), "processed": 0, "failed": 0, "bytes": 0, "lines": 0}
+    errors = []
+    levels: dict[str, int] = {}
+    # 同时提交给工作池的任务数有上限，文件再多也不会一次创建全部 future
+    max_pending = (worker_processes if cpu_bound else worker_threads) * 4
+    pending: dict[asyncio.Future, str] = {}  # future -> 文件路径
+    queue = iter(files)
+
+    def submit():
+        for file in queue:
+            pending[loop.run_in_executor(executor, work, file)] = file
+            if len(pending) >= max_pending:
+                return
+
+    submit()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                file = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    if len(errors) < max_reported_errors:
+                        errors.append(f"{file}: {e}")
+                    continue
+                summary["processed"] += 1
+                summary["bytes"] += result["bytes"]
+                summary["lines"] += result["lines"]
+                for level, count in result.get("levels", {}).items():
+                    levels[level] = levels.get(level, 0) + count
+            submit()
+            await progress.advance(len(done))
+    finally:
+        # 请求被取消时，还没开始执行的任务不再执行
+        for future in pending:
+            future.cancel()
+    await progress.flush()
+
+    if levels:
+        summary["levels"] = levels
+    summary["errors"] = errors
+    summary["progress"] = progress.stats()
+    return summary
 
 
 if __name__ == "__main__":
-    mcp.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(mcp)
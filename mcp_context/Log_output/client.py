@@ -5,7 +5,10 @@ from mcp.types import LoggingMessageNotificationParams
 
 
 async def logging_handler(params: LoggingMessageNotificationParams):
-    print(params)
+    # 服务端批量发送日志：data 是单条日志的字符串，或者连续多条同级别日志的字符串列表
+    lines = params.data if isinstance(params.data, list) else [params.data]
+    for line in lines:
+        print(f"[{params.level}] {line}")
 
 
 async def run():
@@ -14,6 +17,8 @@ async def run():
             read_stream, write_stream, logging_callback=logging_handler
         ) as session:
             await session.initialize()
+            # 只接收 info 及以上级别的日志，服务端不会构造和发送 debug 日志
+            await session.set_logging_level("info")
 
             tools = (await session.list_tools()).tools
             # print(tools)
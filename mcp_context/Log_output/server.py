@@ -1,7 +1,21 @@
 import asyncio
+import os
+import sys
+
 from mcp.server.fastmcp import FastMCP, Context
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcp_common.log_sink import LogSink, enable_log_level
+from mcp_common.serving import run_server
+
+# 日志批量发送：缓冲条数达到 LOG_BATCH_SIZE 或等待 LOG_FLUSH_INTERVAL 秒后发送一次
+log_batch_size = int(os.getenv("LOG_BATCH_SIZE", "50"))
+log_flush_interval = float(os.getenv("LOG_FLUSH_INTERVAL", "0.2"))
+log_max_buffer = int(os.getenv("LOG_MAX_BUFFER", "1000"))
+
 mcp: FastMCP = FastMCP()
+# 支持客户端通过 logging/setLevel 设置需要的最低日志级别
+enable_log_level(mcp)
 
 
 @mcp.tool()
@@ -13,12 +27,21 @@ async def log_tool(files: list[str], ctx: Context):
     :param ctx: 上下文对象，无需客户端传递
     :return: 处理结果
     """
-    for index, file in enumerate(files):
-        await asyncio.sleep(1)
-        # ctx.log()
-        await ctx.info(f"正在处理第{index+1}个文件")
-    return "所有文件处理完成"
+    async with LogSink(
+        ctx,
+        logger="log_tool",
+        batch_size=log_batch_size,
+        flush_interval=log_flush_interval,
+        max_buffer=log_max_buffer,
+    ) as log:
+        for index, file in enumerate(files):
+            await asyncio.sleep(1)
+            # 级别低于客户端设置时直接跳过，不会格式化也不会发送
+            log.debug("文件 %s 处理细节", file)
+            log.info("正在处理第%d个文件", index + 1)
+    return f"所有文件处理完成，日志统计: {log.stats()}"
 
 
 if __name__ == "__main__":
-    mcp.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(mcp)
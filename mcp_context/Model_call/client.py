@@ -1,41 +1,30 @@
 import asyncio
-from openai import OpenAI
 import os
-from typing import Any
+import sys
 from mcp.client.sse import sse_client
-from mcp import ClientSession
-from mcp.types import CreateMessageRequestParams, TextContent, CreateMessageResult
-from mcp.client.session import RequestResponder
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcp_common.llm_gateway import close_gateway
+from mcp_common.sampling import ConcurrentSamplingSession, SamplingHandler
+
 load_dotenv()
 
+# 同时进行的采样(LLM 调用)数上限，以及相同采样请求的缓存条数(0 表示不缓存)
+sampling_concurrency = int(os.getenv("SAMPLING_CONCURRENCY", "4"))
+sampling_cache_size = int(os.getenv("SAMPLING_CACHE_SIZE", "0"))
 
-async def sampling_handler(
-    context: RequestResponder["ClientSession", Any], params: CreateMessageRequestParams
-):
-    print(f"context: {context}")
-    print(f"params: {params}")
-    openai = OpenAI(
-        base_url=os.getenv("BASE_URL"),
-        api_key=os.getenv("API_KEY"),
-        timeout=60,
-    )
-    message = params.messages[0]
-    messages = [{"role": message.role, "content": message.content.text}]
-    response = openai.chat.completions.create(messages=messages, model="gpt-4o")
-    print(response)
-    text = response.choices[0].message.content
-    return CreateMessageResult(
-        role="assistant",
-        content=TextContent(type="text", text=text),
-        model="gpt-4o",
-    )
+# 所有采样请求共用一个处理器：复用网关的连接池，服务端突发的 create_message 请求在信号量处排队
+sampling_handler = SamplingHandler(
+    max_concurrency=sampling_concurrency,
+    cache_size=sampling_cache_size,
+)
 
 
 async def run():
     async with sse_client("http://127.0.0.1:8000/sse") as (read_stream, write_stream):
-        async with ClientSession(
+        # ConcurrentSamplingSession 并发处理服务端的采样请求，默认的 ClientSession 会逐个串行处理
+        async with ConcurrentSamplingSession(
             read_stream, write_stream, sampling_callback=sampling_handler
         ) as session:
             await session.initialize()
@@ -45,7 +34,15 @@ async def run():
             tool = tools[0]
             response = await session.call_tool(name=tool.name)
             print(response)
+            print(sampling_handler.stats())
+
+
+async def main():
+    try:
+        await run()
+    finally:
+        await close_gateway()
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    asyncio.run(main())
@@ -1,6 +1,18 @@
+import os
+import sys
+
 from mcp.server.fastmcp import FastMCP, Context
 from mcp.types import SamplingMessage, TextContent
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcp_common.progress import ProgressReporter
+from mcp_common.sampling_batch import SamplingBatch, check_sampling
+from mcp_common.serving import run_server
+
+# 批量采样的并发数和单个请求的超时时间(秒)
+sampling_concurrency = int(os.getenv("SAMPLING_CONCURRENCY", "4"))
+sampling_timeout = float(os.getenv("SAMPLING_TIMEOUT", "120"))
+
 mcp: FastMCP = FastMCP()
 
 
@@ -10,6 +22,7 @@ async def sampling_tool(ctx: Context):
     模型调用
     直接发送一个Sampling的消息
     """
+    check_sampling(ctx)
     response = await ctx.session.create_message(
         max_tokens=2048,
         messages=[
@@ -25,5 +38,35 @@ async def sampling_tool(ctx: Context):
     return "采样完成"
 
 
+@mcp.tool()
+async def sampling_batch_tool(topics: list[str], ctx: Context):
+    """
+    批量模型调用
+    为每个主题写一首诗词，多个采样请求并发发给客户端，按完成顺序汇报进度
+    :param topics: 主题列表
+    :param ctx: 上下文对象，无需客户端传递
+    :return: 每个主题的诗词以及采样耗时统计
+    """
+    batch = SamplingBatch(
+        ctx,
+        max_concurrency=sampling_concurrency,
+        timeout=sampling_timeout,
+        max_tokens=1024,
+        system_prompt="你是一位擅长写中文诗词的诗人",
+    )
+    progress = ProgressReporter(ctx, total=len(topics))
+    poems = {}
+    errors = {}
+    async for item in batch.results(f"请以“{topic}”为主题写一首诗词" for topic in topics):
+        topic = topics[item.index]
+        if item.error:
+            errors[topic] = item.error
+        else:
+            poems[topic] = item.text
+        await progress.advance(message=f"{topic} 完成，耗时 {item.latency:.2f}s")
+    return {"poems": poems, "errors": errors, "stats": batch.stats()}
+
+
 if __name__ == "__main__":
-    mcp.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(mcp)
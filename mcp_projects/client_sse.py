@@ -1,22 +1,25 @@
-from openai import OpenAI
 import asyncio
-import json
 import sys
 import os
 from mcp.client.sse import sse_client
 from mcp import ClientSession
 from contextlib import AsyncExitStack
 from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.tool_calls import call_tools
+
 load_dotenv()
 
 class MCPClient:
-  def __init__(self, server_path):
+  def __init__(self, server_path, max_concurrency=8, call_timeout=30.0):
     self.server_path = server_path
-    self.openai = OpenAI(
-        base_url=os.getenv("BASE_URL"),
-        api_key=os.getenv("API_KEY"),
-        timeout=60,
-    )
+    # 工具并发调用上限与单个工具调用超时时间(秒)
+    self.max_concurrency = max_concurrency
+    self.call_timeout = call_timeout
+    # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+    self.llm = get_gateway()
     self.exit_stack = AsyncExitStack()
 
   async def run(self, query: str):
@@ -63,7 +66,7 @@ class MCPClient:
       "role": "user",
       "content": query
     }]
-    openai_response = self.openai.chat.completions.create(
+    openai_response = await self.llm.chat(
       messages=messages,
       model="gpt-4o",
       tools = tools
@@ -77,22 +80,18 @@ class MCPClient:
       messages.append(choice.message.model_dump())
       # 获取工具
       tool_calls = choice.message.tool_calls
-      # 依次调用
-      for tool_call in tool_calls:
-        tool_call_id = tool_call.id
-        function = tool_call.function
-        function_name = function.name
-        function_arguments = json.loads(function.arguments)
-        result = await session.call_tool(name = function_name, arguments=function_arguments)
-        content = result.content[0].text
-        print(content)
-        messages.append({
-          "role": "tool",
-          "content": content,
-          "tool_call_id": tool_call_id
-        })
+      # 并发调用，结果按 tool_call_id 原始顺序返回
+      tool_messages = await call_tools(
+        session,
+        tool_calls,
+        max_concurrency=self.max_concurrency,
+        timeout=self.call_timeout,
+      )
+      for tool_message in tool_messages:
+        print(tool_message["content"])
+      messages.extend(tool_messages)
       # 重新把数据发给LLM，让LLM给出最终响应
-      response = self.openai.chat.completions.create(
+      response = await self.llm.chat(
         model = "gpt-4o",
         messages = messages
       )
@@ -110,6 +109,7 @@ async def main():
     await client.run('计算1加0.00001等于多少')
   finally:
     await client.aclose()
+    await close_gateway()
 
 if __name__ == '__main__':
   # client = MCPClient('./server.py')
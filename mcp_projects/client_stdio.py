@@ -1,31 +1,32 @@
-from openai import OpenAI
 import asyncio
-import json
 import sys
 import os
-from mcp.client.stdio import StdioServerParameters,stdio_client
 from mcp import ClientSession
-from contextlib import AsyncExitStack
 from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.session_pool import StdioSessionPool
+from mcp_common.tool_calls import call_tools
+
 load_dotenv()
 class MCPClient:
-  def __init__(self, server_path):
+  def __init__(self, server_path, max_concurrency=8, call_timeout=30.0, pool_size=2, max_requests=100):
     self.server_path = server_path
-    self.openai = OpenAI(
-      base_url=os.getenv("BASE_URL"),
-      api_key=os.getenv("API_KEY"),
-      timeout=60,
-    )
-    self.exit_stack = AsyncExitStack()
+    # 预热的服务端进程池，多次 run() 复用已初始化的会话
+    self.pool = StdioSessionPool(server_path, size=pool_size, max_requests=max_requests)
+    # 工具并发调用上限与单个工具调用超时时间(秒)
+    self.max_concurrency = max_concurrency
+    self.call_timeout = call_timeout
+    # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+    self.llm = get_gateway()
 
   async def run(self, query: str):
-    # 1. 创建连接服务器端的参数
-    from mcp.client.stdio import StdioServerParameters
-    server_parameters = StdioServerParameters(
-      command = 'python',
-      args = [self.server_path],
-    )
+    # 从进程池租用已初始化的会话，省去每次启动解释器和 initialize 握手
+    async with self.pool.lease() as session:
+      await self.process(session, query)
 
+  async def process(self, session: ClientSession, query: str):
     # # 2. 创建读写流
     # async with stdio_client(server=server_parameters) as (read_stream, write_stream):
     #   # 3. 创建客户端与服务端的进程通话
@@ -100,12 +101,6 @@ class MCPClient:
     #     )
     #     print(response.choices[0].message.content)
 
-    # 改成用异步上下文堆栈来处理
-    read_stream, write_stream = await self.exit_stack.enter_async_context(stdio_client(server=server_parameters))
-    session = await self.exit_stack.enter_async_context(ClientSession(read_stream=read_stream, write_stream=write_stream))
-
-    # 4. 初始化请求
-    await session.initialize()
     # 5. 获取服务端的所有tools
     response = await session.list_tools()
     # print(response)
@@ -136,7 +131,7 @@ class MCPClient:
       "role": "user",
       "content": query
     }]
-    openai_response = self.openai.chat.completions.create(
+    openai_response = await self.llm.chat(
       messages=messages,
       model="gpt-4o",
       tools = tools
@@ -152,22 +147,18 @@ class MCPClient:
       messages.append(choice.message.model_dump())
       # 获取工具
       tool_calls = choice.message.tool_calls
-      # 依次调用
-      for tool_call in tool_calls:
-        tool_call_id = tool_call.id
-        function = tool_call.function
-        function_name = function.name
-        function_arguments = json.loads(function.arguments)
-        result = await session.call_tool(name = function_name, arguments=function_arguments)
-        content = result.content[0].text
-        print(content)
-        messages.append({
-          "role": "tool",
-          "content": content,
-          "tool_call_id": tool_call_id
-        })
+      # 并发调用，结果按 tool_call_id 原始顺序返回
+      tool_messages = await call_tools(
+        session,
+        tool_calls,
+        max_concurrency=self.max_concurrency,
+        timeout=self.call_timeout,
+      )
+      for tool_message in tool_messages:
+        print(tool_message["content"])
+      messages.extend(tool_messages)
       # 重新把数据发给LLM，让LLM给出最终响应
-      response = self.openai.chat.completions.create(
+      response = await self.llm.chat(
         model = "gpt-4o",
         messages = messages
       )
@@ -177,7 +168,7 @@ class MCPClient:
       print('回复错误')
 
   async def aclose(self):
-    await self.exit_stack.aclose()
+    await self.pool.aclose()
 
 async def main():
   client = MCPClient(server_path='./server.py')
@@ -185,6 +176,7 @@ async def main():
     await client.run('计算1加0.00001等于多少')
   finally:
     await client.aclose()
+    await close_gateway()
 
 if __name__ == '__main__':
   # client = MCPClient('./server.py')
@@ -1,8 +1,21 @@
+import json
+import os
+import sys
+
 from mcp.server.fastmcp import FastMCP
+from mcp.types import ToolAnnotations
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.serving import run_server
 
 app = FastMCP("start mcp")
 
-@app.tool()
+# 工具名 -> schema 的 JSON 文本，第一次查询时由 build_schema_registry 生成
+# 不在导入时生成：导入本模块后还可能注册其他工具(如 benchmarks/transports.py 的 echo)
+tool_schemas: dict[str, str] = {}
+
+# 纯函数：相同参数总是返回相同结果，客户端可以缓存
+@app.tool(annotations=ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False))
 def plus_tool(a:float, b:float) -> float:
   '''
   计算两个浮点数和
@@ -10,39 +23,54 @@ def plus_tool(a:float, b:float) -> float:
   :param b: 浮点数2
   :return 浮点数
   '''
-  # 动态获取自身schema信息
-  try:
-      from pprint import pprint
-      # FastMCP 可能将工具注册在 app._tools 或 app.tools
-      # 取第一个名为 plus_tool 的schema
-      schema = None
-      if hasattr(app, "_tools"):
-          for t in app._tools:
-              if t.name == "plus_tool":
-                  schema = t.input_schema if hasattr(t, "input_schema") else t.__dict__
-                  break
-      elif hasattr(app, "tools"):
-          for t in app.tools:
-              if t.name == "plus_tool":
-                  schema = t.input_schema if hasattr(t, "input_schema") else t.__dict__
-                  break
-      print("plus_tool schema info:")
-      pprint(schema)
-  except Exception as e:
-      print(f"schema info error: {e}")
   return a + b
 
+@app.resource("schema://tools", mime_type="application/json")
+def tool_names() -> str:
+  '''
+  已注册的工具名称列表
+  '''
+  return json.dumps(list(schema_registry()))
+
+@app.resource("schema://tools/{name}", mime_type="application/json")
+def tool_schema(name: str) -> str:
+  '''
+  查询工具的 schema(输入、输出格式和注解)，替代在工具中动态反射
+  :param name: 工具名称
+  '''
+  schema = schema_registry().get(name)
+  if schema is None:
+    raise ValueError(f"工具 {name} 不存在")
+  return schema
+
+def build_schema_registry() -> dict[str, str]:
+  '''
+  生成工具 schema 的注册表，内容与 tools/list 返回给客户端的一致
+  '''
+  registry = {}
+  for tool in app._tool_manager.list_tools():
+    schema = {
+      "name": tool.name,
+      "title": tool.title,
+      "description": tool.description,
+      "inputSchema": tool.parameters,
+      "outputSchema": tool.output_schema,
+      "annotations": tool.annotations.model_dump(exclude_none=True) if tool.annotations else None,
+    }
+    registry[tool.name] = json.dumps(
+      {key: value for key, value in schema.items() if value is not None}, ensure_ascii=False
+    )
+  return registry
+
+def schema_registry() -> dict[str, str]:
+  '''
+  第一次查询时生成注册表，此时服务已经启动，所有工具都已注册；之后按工具名直接取出序列化好的 JSON
+  '''
+  if not tool_schemas:
+    tool_schemas.update(build_schema_registry())
+  return tool_schemas
+
 if __name__ == '__main__':
-  # 工具注册后，保存 plus_tool 的 schema 信息到日志
-  try:
-      from pprint import pprint
-      print("app._tools:")
-      if hasattr(app, "_tools"):
-          pprint(app._tools)
-      print("app.tools:")
-      if hasattr(app, "tools"):
-          pprint(app.tools)
-  except Exception as e:
-      print(f"print tools error: {e}")
-  # app.run(transport='stdio')
-  app.run(transport='sse')
+  # stdio 传输下 stdout 是 JSON-RPC 通道，不能向其中打印任何内容，schema 通过 schema://tools/{name} 资源查询
+  # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE，MCP_TRANSPORT=stdio 时使用 stdio
+  run_server(app)
@@ -1,30 +1,180 @@
-from mcp.server.fastmcp import FastMCP
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+from urllib.parse import unquote
+
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.prompts.base import Message, UserMessage
+from mcp.types import EmbeddedResource, TextResourceContents
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.cache import TTLCache
+from mcp_common.file_store import FileStore
+from mcp_common.pagination import enable_pagination
+from mcp_common.sampling_batch import SampleResult, SamplingBatch
+from mcp_common.serving import run_server
+from mcp_common.text_chunks import estimate_text_tokens, iter_file_chunks, split_text
+
+# 列表接口每页返回的条数
+page_size = int(os.getenv("MCP_PAGE_SIZE", "100"))
+# 提示词引用的文档所在目录，以及渲染结果缓存的条数
+document_root = os.getenv(
+    "PROMPT_DOCUMENT_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+prompt_cache_size = int(os.getenv("PROMPT_CACHE_SIZE", "256"))
+# 长文档分块总结：每块的 token 上限、并发采样数、每次采样生成的 token 上限
+summary_chunk_tokens = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+summary_concurrency = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+summary_max_tokens = int(os.getenv("SUMMARY_MAX_TOKENS", "1024"))
+
+URI_PREFIX = "file://data/"
+
+document_store = FileStore(document_root)
+# 渲染好的提示词：(提示词名, 参数哈希, 文档版本) -> 消息列表
+rendered_prompts = TTLCache(maxsize=prompt_cache_size)
 
 app = FastMCP()
+enable_pagination(app, page_size=page_size)
 
 
-@app.prompt()
-def policy_prompt(policy: str):
-	'''
-    能够对用户提供的政策内容，对其进行总结、提取关键信息的提示词模板
-    :param policy: 需要总结的政策内容
-    :return: 总结政策的提示词模板
-    '''
-	# 如果直接返回一个字符串，那么哭护短接收到的是一个PromptMessage对象
-	# 这个对象默认role=user，可以是其他role
-    # 如[{"role":"stystem", "content":"xxx"}] 必须是字典形式
-	return [{
-		"role":"user",
-		"content":f'''
-		这个是政策内容:“{policy}”，请对该政策内容进行总结，总结的规则为:
+@app.resource(
+    uri="file://data/{name}",
+    name="document",
+    description="读取提示词可以引用的文档，如 file://data/policy.txt。\n :param name: 文件名",
+    mime_type="text/plain",
+)
+async def document(name: str) -> str:
+    # 模板参数不能包含 /，子目录中的文件通过百分号编码传入
+    return await document_store.read_text(unquote(name))
+
+
+def document_name(uri: str) -> str:
+    """资源 URI 对应的文档路径"""
+    if not uri.startswith(URI_PREFIX):
+        raise ValueError(f"不支持的资源 URI: {uri}，应为 {URI_PREFIX}<文件名>")
+    return unquote(uri[len(URI_PREFIX):])
+
+
+def document_version(uri: str) -> tuple[int, int]:
+    """只 stat 不读取，文件变化后版本随之变化"""
+    return FileStore.version(document_store.resolve(document_name(uri)))
+
+
+async def load_document(uri: str) -> tuple[TextResourceContents, tuple[int, int]]:
+    """按资源 URI 从文档存储中读取文档，返回资源内容和这份内容对应的文件版本"""
+    name = document_name(uri)
+    text, version = await document_store.read_text_versioned(name)
+    mime_type, _ = mimetypes.guess_type(name)
+    return TextResourceContents(uri=uri, text=text, mimeType=mime_type or "text/plain"), version
+
+
+def prompt_key(name: str, version, **arguments) -> tuple:
+    digest = hashlib.sha256(json.dumps(arguments, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return name, digest, version
+
+
+POLICY_INSTRUCTIONS = '''
+        请对{source}进行总结，总结的规则为:
         1.提取政策要点。
         2.针对每个政策要点按照以下格式进行总结
             *要点标题:政策的标题，要包含具体的政策信息
             *针对人群:政策针对的人群
             *有效时间:政策执行的开始时间和结束时间
             *相关部门:政策是由哪些部门执行总结的内容不要太官方，用通俗易懂的语言。
-		'''
-	}]
+        '''
+
+
+@app.prompt()
+async def policy_prompt(policy_uri: str = "", policy: str = "") -> list[Message]:
+    '''
+    能够对用户提供的政策内容，对其进行总结、提取关键信息的提示词模板
+    :param policy_uri: 政策文档的资源 URI，如 file://data/policy.txt，文档较大时优先使用
+    :param policy: 需要总结的政策内容，没有 policy_uri 时使用
+    :return: 总结政策的提示词模板
+    '''
+    # 如果直接返回一个字符串，那么客户端接收到的是一个PromptMessage对象
+    # 这个对象默认role=user，可以是其他role
+    if not policy_uri and not policy:
+        raise ValueError("policy_uri 和 policy 至少需要提供一个")
+    # 相同参数且文档未修改时直接返回上次渲染的结果，只需要 stat 一次，不读取文档
+    version = document_version(policy_uri) if policy_uri else None
+    key = prompt_key("policy_prompt", version, policy_uri=policy_uri, policy=policy)
+    messages = rendered_prompts.get(key)
+    if messages is not None:
+        return messages
+
+    if policy_uri:
+        resource, version = await load_document(policy_uri)
+        # stat 之后文件可能又被修改，按实际读到的内容的版本缓存
+        key = prompt_key("policy_prompt", version, policy_uri=policy_uri, policy=policy)
+        # 文档作为内嵌资源单独放在一条消息中，不再拼接进提示词字符串
+        messages = [
+            UserMessage(EmbeddedResource(type="resource", resource=resource)),
+            UserMessage(POLICY_INSTRUCTIONS.format(source=f"上面的政策文档({policy_uri})")),
+        ]
+    else:
+        messages = [UserMessage(f"这个是政策内容:“{policy}”，" + POLICY_INSTRUCTIONS.format(source="该政策内容"))]
+    rendered_prompts.set(key, messages)
+    return messages
+
+
+MAP_PROMPT = "下面是一份政策文档的第 {index} 部分，请提取其中的政策要点、针对人群、有效时间和相关部门，只保留关键信息:\n{chunk}"
+COMBINE_PROMPT = "下面是同一份政策文档若干部分的要点摘要，请合并去重，保留全部关键信息:\n{summaries}"
+
+
+def texts(items: list[SampleResult]) -> list[str]:
+    for item in items:
+        if item.error:
+            raise RuntimeError(f"第 {item.index + 1} 个采样请求失败: {item.error}")
+    return [item.text for item in items]
+
+
+@app.tool()
+async def summarize_policy(policy_uri: str, ctx: Context) -> str:
+    """
+    总结超出单次上下文长度的长政策文档：分块并行提取要点，再合并为最终总结
+    :param policy_uri: 政策文档的资源 URI，如 file://data/policy.txt
+    :return: 按 policy_prompt 规则整理的总结
+    """
+    path = document_store.resolve(document_name(policy_uri))
+    batch = SamplingBatch(ctx, max_concurrency=summary_concurrency, max_tokens=summary_max_tokens)
+    chunk_count = 0
+    reading = True  # 文档还没读完时总块数未知
+
+    async def map_prompts():
+        nonlocal chunk_count, reading
+        async for chunk in iter_file_chunks(path, summary_chunk_tokens):
+            chunk_count += 1
+            yield MAP_PROMPT.format(index=chunk_count, chunk=chunk)
+        reading = False
+
+    # map：边读边切块，同时在途的采样请求不超过 summary_concurrency，读取也随之限速
+    summaries: dict[int, str] = {}
+    async for item in batch.results(map_prompts()):
+        summaries[item.index] = texts([item])[0]
+        await ctx.report_progress(
+            len(summaries),
+            None if reading else chunk_count + 1,
+            f"已完成 {len(summaries)} 块",
+        )
+
+    # reduce：部分摘要合起来仍超出上限时分组合并，直到能放进一次调用
+    partials = [summaries[index] for index in range(len(summaries))]
+    while len(partials) > 1 and estimate_text_tokens("\n\n".join(partials)) > summary_chunk_tokens:
+        groups = list(split_text(["\n\n".join(partials)], summary_chunk_tokens))
+        if len(groups) >= len(partials):
+            # 摘要已经无法通过合并继续缩短
+            break
+        partials = texts(await batch.gather(COMBINE_PROMPT.format(summaries=group) for group in groups))
+    final = texts(await batch.gather([
+        "下面是政策文档的要点摘要:\n" + "\n\n".join(partials) + POLICY_INSTRUCTIONS.format(source="该政策")
+    ]))[0]
+    await ctx.report_progress(chunk_count + 1, chunk_count + 1, "总结完成")
+    return final
+
 
 if __name__ == "__main__":
-    app.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(app)
@@ -1,4 +1,3 @@
-from openai import OpenAI
 import asyncio
 import json
 import sys
@@ -7,15 +6,17 @@ from mcp.client.sse import sse_client
 from mcp import ClientSession
 from contextlib import AsyncExitStack
 from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.pagination import iter_resources
+
 load_dotenv()
 
 class MCPClient:
     def __init__(self, server_path):
-        self.openai = OpenAI(
-            base_url=os.getenv("BASE_URL"),
-            api_key=os.getenv("API_KEY"),
-            timeout=60,
-        )
+        # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+        self.llm = get_gateway()
         self.exit_stack = AsyncExitStack()
         self.resources = {}  # 存储服务端资源信息
 
@@ -32,9 +33,8 @@ class MCPClient:
         await session.initialize()
         # 4. 获取服务端提供的所有资源
         functions = []
-        responses = (await session.list_resources()).resources
-        # print(responses)
-        for resource in responses:
+        # 按 nextCursor 逐页拉取，资源很多时不会一次性加载全部列表
+        async for resource in iter_resources(session):
             uri = resource.uri
             name = resource.name
             description = resource.description
@@ -62,7 +62,7 @@ class MCPClient:
 
         # 创建消息发送给LLM
         messages = [{"role": "user", "content": query}]
-        openai_response = self.openai.chat.completions.create(
+        openai_response = await self.llm.chat(
             messages=messages, model="gpt-4o", tools=functions
         )
 
@@ -92,7 +92,7 @@ class MCPClient:
                     "content":result,
                     "tool_call_id":tool_call_id
                 })
-                model_response = self.openai.chat.completions.create(
+                model_response = await self.llm.chat(
                     model="gpt-4o",
                     messages=messages
                 )
@@ -109,6 +109,7 @@ async def main():
         await client.run("查询上海海事大学的信息")
     finally:
         await client.aclose()
+        await close_gateway()
 
 
 if __name__ == "__main__":
@@ -1,22 +1,24 @@
 import aiofiles
 import asyncio
+import sys
 import base64
+import json
 import os
-from openai import OpenAI
 from mcp.client.sse import sse_client
 from mcp import ClientSession
 from contextlib import AsyncExitStack
+from pydantic import AnyUrl
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+
 load_dotenv()
 
 class MCPClient:
     def __init__(self, server_path):
-        self.openai = OpenAI(
-            base_url=os.getenv("BASE_URL"),
-            api_key=os.getenv("API_KEY"),
-            timeout=60,
-        )
+        # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+        self.llm = get_gateway()
         self.exit_stack = AsyncExitStack()
         self.resources = {}  # 存储服务端资源信息
 
@@ -66,7 +68,7 @@ class MCPClient:
             {"role": "system", "content": "你有能力通过工具 Avatar获取头像"},
             {"role": "user", "content": query},
         ]
-        openai_response = self.openai.chat.completions.create(
+        openai_response = await self.llm.chat(
             messages=messages, model="gpt-4o", tools=functions
         )
 
@@ -77,12 +79,35 @@ class MCPClient:
             function = tool_call.function
             function_name = function.name
             function_uri = self.resources[function_name]["uri"]
-            result = await session.read_resource(function_uri)
-            print(result)
-            async with aiofiles.open("data/avatar.png", mode="wb") as fp:
-                await fp.write(base64.b64decode(result.contents[0].blob))
+            await self.download(session, str(function_uri), "download/avatar.png")
             print("下载完毕")
 
+    async def download(self, session: ClientSession, uri: str, path: str):
+        """
+        分块下载二进制资源，每块到达后直接写盘，内存中最多同时保留两块
+        :param uri: 资源 uri，如 image://avatar.png
+        :param path: 保存路径
+        """
+        info = await session.read_resource(AnyUrl(f"{uri}/info"))
+        info = json.loads(info.contents[0].text)
+        size = info["size"]
+        chunk_size = info["chunk_size"]
+
+        async def fetch(offset: int) -> bytes:
+            result = await session.read_resource(AnyUrl(f"{uri}/{offset}/{chunk_size}"))
+            return base64.b64decode(result.contents[0].blob)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        async with aiofiles.open(path, mode="wb") as fp:
+            offset = 0
+            pending = asyncio.create_task(fetch(offset)) if size else None
+            while pending is not None:
+                data = await pending
+                offset += len(data)
+                # 写盘的同时预取下一块
+                pending = asyncio.create_task(fetch(offset)) if data and offset < size else None
+                await fp.write(data)
+
     async def aclose(self):
         await self.exit_stack.aclose()
 
@@ -93,6 +118,7 @@ async def main():
         await client.run("请调用工具获取一张用户头像")
     finally:
         await client.aclose()
+        await close_gateway()
 
 
 if __name__ == "__main__":
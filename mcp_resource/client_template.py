@@ -1,20 +1,22 @@
 import asyncio
+import sys
 import json
 import os
-from openai import OpenAI
 from mcp.client.sse import sse_client
 from mcp import ClientSession
 from contextlib import AsyncExitStack
 from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.pagination import iter_resource_templates
+
 load_dotenv()
 
 class MCPClient:
     def __init__(self, server_path):
-        self.openai = OpenAI(
-            base_url=os.getenv("BASE_URL"),
-            api_key=os.getenv("API_KEY"),
-            timeout=60,
-        )
+        # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+        self.llm = get_gateway()
         self.exit_stack = AsyncExitStack()
         self.resources = {}  # 存储服务端资源信息
 
@@ -31,10 +33,8 @@ class MCPClient:
         await session.initialize()
         # 4. 获取服务端提供的所有资源
         functions = []
-        resources = (await session.list_resource_templates()).resourceTemplates
-        # print(resources)
-
-        for resource in resources:
+        # 按 nextCursor 逐页拉取资源模板
+        async for resource in iter_resource_templates(session):
             uri = resource.uriTemplate
             name = resource.name
             description = resource.description
@@ -61,10 +61,10 @@ class MCPClient:
 
         # 创建消息发送给LLM
         messages = [
-            {"role": "system", "content": "你有能力通过工具 user_detail获取用户信息"},
+            {"role": "system", "content": "你有能力通过工具 user_detail获取用户信息，查询多个用户时使用 user_detail_batch 一次完成"},
             {"role": "user", "content": query},
         ]
-        openai_response = self.openai.chat.completions.create(
+        openai_response = await self.llm.chat(
             messages=messages, model="gpt-4o", tools=functions
         )
         model_choice = openai_response.choices[0]
@@ -91,7 +91,7 @@ class MCPClient:
                 messages.append(
                     {"role": "tool", "content": result, "tool_call_id": tool_call_id}
                 )
-                model_response = self.openai.chat.completions.create(
+                model_response = await self.llm.chat(
                     model="gpt-4o", messages=messages
                 )
                 print(model_response.choices[0].message.content)
@@ -106,6 +106,7 @@ async def main():
         await client.run("帮我查找一下用户id为111的用户信息")
     finally:
         await client.aclose()
+        await close_gateway()
 
 
 if __name__ == "__main__":
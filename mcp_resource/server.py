@@ -1,7 +1,34 @@
-import aiofiles
+import asyncio
+import mimetypes
+import os
+import sys
+from urllib.parse import unquote
+
 from mcp.server.fastmcp import FastMCP
+from mcp.server.session import ServerSession
+from pydantic import AnyUrl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.file_store import FileStore
+from mcp_common.pagination import enable_pagination
+from mcp_common.serving import run_server
+from mcp_common.subscriptions import enable_subscriptions
+
+# 资源根目录以及内存缓存上限，可通过环境变量调整
+resource_root = os.getenv(
+    "RESOURCE_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+resource_cache_bytes = int(os.getenv("RESOURCE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# 轮询已订阅文件 mtime 的间隔(秒)
+watch_interval = float(os.getenv("RESOURCE_WATCH_INTERVAL", "1"))
+# 列表接口每页返回的条数
+page_size = int(os.getenv("MCP_PAGE_SIZE", "100"))
+
+URI_PREFIX = "file://data/"
 
+file_store = FileStore(resource_root, max_bytes=resource_cache_bytes)
 app = FastMCP()
+enable_pagination(app, page_size=page_size)
 
 
 @app.resource(
@@ -11,10 +38,86 @@ app = FastMCP()
     mime_type="text/plain",
 )
 async def SMU_resource():
-    async with aiofiles.open("data/SMU.txt", mode="r", encoding="utf-8") as fp:
-        content = fp.read()
-    return content
+    # 内容缓存在内存中，文件没有修改时不会重新读取
+    return await file_store.read_text("SMU.txt")
+
+
+@app.resource(
+    uri="file://data/{name}",
+    name="data_file",
+    description="读取资源根目录下的任意文件，子目录中的文件需要把 / 编码为 %2F，如 file://data/docs%2Fa.txt。\n :param name: 文件名",
+)
+async def data_file(name: str):
+    # 模板参数不能包含 /，子目录中的文件通过百分号编码传入
+    name = unquote(name)
+    mime_type, _ = mimetypes.guess_type(name)
+    if mime_type and mime_type.startswith("text/"):
+        return await file_store.read_text(name)
+    return await file_store.read_bytes(name)
+
+
+# 资源订阅：uri -> 订阅该资源的会话，文件变化时发送 notifications/resources/updated
+subscriptions: dict[str, set[ServerSession]] = {}
+watched_versions: dict[str, tuple[int, int]] = {}
+watcher: asyncio.Task | None = None
+
+
+def uri_to_path(uri: str) -> str:
+    if not uri.startswith(URI_PREFIX):
+        raise ValueError(f"不支持订阅的资源: {uri}")
+    return unquote(uri[len(URI_PREFIX):])
+
+
+async def watch_files():
+    """定期 stat 已订阅的文件，发现 mtime/size 变化就通知订阅者"""
+    while subscriptions:
+        await asyncio.sleep(watch_interval)
+        for uri, sessions in list(subscriptions.items()):
+            try:
+                version = FileStore.version(file_store.resolve(uri_to_path(uri)))
+            except OSError:
+                continue
+            if watched_versions.get(uri) == version:
+                continue
+            watched_versions[uri] = version
+            for session in list(sessions):
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                except Exception:
+                    # 会话已经断开
+                    sessions.discard(session)
+            if not sessions:
+                remove_subscription(uri)
+
+
+def remove_subscription(uri: str):
+    """最后一个订阅者离开后不再跟踪该资源"""
+    subscriptions.pop(uri, None)
+    watched_versions.pop(uri, None)
+
+
+async def subscribe(uri: AnyUrl):
+    global watcher
+    uri = str(uri)
+    path = file_store.resolve(uri_to_path(uri))
+    watched_versions.setdefault(uri, FileStore.version(path))
+    subscriptions.setdefault(uri, set()).add(app._mcp_server.request_context.session)
+    if watcher is None or watcher.done():
+        watcher = asyncio.create_task(watch_files())
+
+
+async def unsubscribe(uri: AnyUrl):
+    uri = str(uri)
+    sessions = subscriptions.get(uri)
+    if sessions is not None:
+        sessions.discard(app._mcp_server.request_context.session)
+        if not sessions:
+            remove_subscription(uri)
+
+
+enable_subscriptions(app, subscribe, unsubscribe)
 
 
 if __name__ == "__main__":
-    app.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(app)
@@ -1,9 +1,56 @@
-import aiofiles
+import json
+import mimetypes
+import mmap
+import os
+import sys
+from collections import OrderedDict
+from typing import Union
+
 from mcp.server.fastmcp import FastMCP
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.file_store import FileStore
+from mcp_common.serving import run_server
+
+# 图片根目录，可通过环境变量调整
+image_root = os.getenv(
+    "IMAGE_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+# 分块读取时单块的默认大小和上限(字节)
+chunk_size = int(os.getenv("IMAGE_CHUNK_SIZE", str(1024 * 1024)))
+max_chunk_size = int(os.getenv("IMAGE_MAX_CHUNK_SIZE", str(8 * 1024 * 1024)))
+# 同时保持打开的内存映射数上限，每个映射占用一个文件描述符
+max_maps = int(os.getenv("IMAGE_MAX_MAPS", "64"))
+
+image_store = FileStore(image_root)
+# 已打开的内存映射：文件路径 -> ((mtime_ns, size), mmap)，文件变化后重新映射，超出上限时关闭最久未使用的
+_maps: OrderedDict[str, tuple[tuple[int, int], mmap.mmap]] = OrderedDict()
+
 app = FastMCP()
 
 
+def get_map(name: str) -> Union[mmap.mmap, bytes]:
+    path = image_store.resolve(name)
+    version = FileStore.version(path)
+    cached = _maps.get(path)
+    if cached is not None and cached[0] == version:
+        _maps.move_to_end(path)
+        return cached[1]
+    if cached is not None:
+        del _maps[path]
+        cached[1].close()
+    # 空文件无法映射
+    if version[1] == 0:
+        return b""
+    with open(path, mode="rb") as fp:
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    _maps[path] = (version, mapped)
+    while len(_maps) > max_maps:
+        _, (_, evicted) = _maps.popitem(last=False)
+        evicted.close()
+    return mapped
+
+
 @app.resource(
     uri="image://avatar.png",
     name="avatar",
@@ -11,13 +58,43 @@ app = FastMCP()
     mime_type="image/png",
 )
 async def Avatar():
-    # 打开文件获取数据，采用异步方法处理
-    async with aiofiles.open(
-        "C:/Users/LT01/Desktop/Doc/IMG/avatar.png", mode="rb"
-    ) as fp:
-        content = await fp.read()
-    return content
+    # 小文件整体返回；大文件请通过 image://avatar.png/{offset}/{length} 分块读取
+    return await image_store.read_bytes("avatar.png")
+
+
+@app.resource(
+    uri="image://{name}/info",
+    name="image_info",
+    description="获取图片大小和建议的分块大小，用于分块下载。\n :param name: 图片文件名",
+    mime_type="application/json",
+)
+def image_info(name: str) -> str:
+    path = image_store.resolve(name)
+    mime_type, _ = mimetypes.guess_type(path)
+    return json.dumps({
+        "name": name,
+        "size": os.path.getsize(path),
+        "chunk_size": chunk_size,
+        "mime_type": mime_type,
+    })
+
+
+@app.resource(
+    uri="image://{name}/{offset}/{length}",
+    name="image_chunk",
+    description="按字节范围读取图片的一部分。\n :param name: 图片文件名\n :param offset: 起始字节\n :param length: 读取长度",
+    mime_type="application/octet-stream",
+)
+def image_chunk(name: str, offset: str, length: str) -> bytes:
+    # 直接从内存映射切片，只复制请求的这一块，不会把整个文件读进内存
+    mapped = get_map(name)
+    start = int(offset)
+    end = min(start + min(int(length), max_chunk_size), len(mapped))
+    if start < 0 or start > len(mapped):
+        raise ValueError(f"offset 超出文件范围: {offset}")
+    return mapped[start:end]
 
 
 if __name__ == "__main__":
-    app.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(app)
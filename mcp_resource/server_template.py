@@ -1,7 +1,47 @@
-import aiofiles
+import os
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from mcp.server.fastmcp import FastMCP
 
-app = FastMCP()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.pagination import enable_pagination
+from mcp_common.record_store import SQLiteRecordStore
+from mcp_common.serving import run_server
+
+# 用户数据库路径以及热点记录缓存条数，可通过环境变量调整
+user_db = os.getenv(
+    "USER_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "users.db")
+)
+user_cache_size = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# 单次批量读取的用户数上限
+max_batch_size = int(os.getenv("USER_MAX_BATCH", "1000"))
+# 列表接口每页返回的条数
+page_size = int(os.getenv("MCP_PAGE_SIZE", "100"))
+
+user_store = SQLiteRecordStore(user_db, table="users", cache_size=user_cache_size)
+
+# 空库时写入的示例数据
+sample_users = {
+    "111": {
+        "user_id": "111",
+        "username": "张三",
+        "gender": "male",
+        "university": "北京大学",
+    },
+}
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    if await user_store.count() == 0:
+        await user_store.put_many(sample_users)
+    yield
+
+
+app = FastMCP(lifespan=app_lifespan)
+enable_pagination(app, page_size=page_size)
 
 
 @app.resource(
@@ -11,13 +51,29 @@ app = FastMCP()
     mime_type="application/json",
 )
 async def user_detail(user_id: str):
+    user = await user_store.get(user_id)
+    if user is None:
+        return {"error": f"用户 {user_id} 不存在"}
+    return user
+
+
+@app.resource(
+    uri="user://batch/{user_ids}",
+    name="user_detail_batch",
+    description="一次返回多个用户的详细信息。\n :param user_ids: 逗号分隔的用户id，如 111,112,113",
+    mime_type="application/json",
+)
+async def user_detail_batch(user_ids: str):
+    ids = [user_id.strip() for user_id in user_ids.split(",") if user_id.strip()]
+    if len(ids) > max_batch_size:
+        raise ValueError(f"单次最多查询 {max_batch_size} 个用户")
+    users = await user_store.get_many(ids)
     return {
-        "user_id": user_id,
-        "username": "张三",
-        "gender": "male",
-        "university": "北京大学",
+        "users": users,
+        "missing": [user_id for user_id in ids if user_id not in users],
     }
 
 
 if __name__ == "__main__":
-    app.run(transport="sse")
+    # 传输方式和 worker 数由 MCP_TRANSPORT / MCP_WORKERS 等环境变量配置，默认 SSE
+    run_server(app)
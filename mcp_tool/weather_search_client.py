@@ -1,36 +1,30 @@
-from openai import OpenAI
 import asyncio
+import sys
 import json
 import os
 from mcp import ClientSession
-from contextlib import AsyncExitStack
-from mcp.client.stdio import StdioServerParameters, stdio_client
 from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.llm_gateway import close_gateway, get_gateway
+from mcp_common.session_pool import StdioSessionPool
+
 load_dotenv()
 
 class MCPClient:
-    def __init__(self, server_path: str):
+    def __init__(self, server_path: str, pool_size: int = 2, max_requests: int = 100):
         self.server_path = server_path
-        self.openai = OpenAI(
-            base_url=os.getenv("BASE_URL"),
-            api_key=os.getenv("API_KEY"),
-            timeout=60,
-        )
-        self.exit_stack = AsyncExitStack()
+        # 预热的服务端进程池，多次 run() 复用已初始化的会话
+        self.pool = StdioSessionPool(server_path, size=pool_size, max_requests=max_requests)
+        # 进程内共享的异步 LLM 网关，避免阻塞事件循环
+        self.llm = get_gateway()
 
     async def run(self, query: str):
-        # 1. 创建连接服务器端的参数
-        server_parameters = StdioServerParameters(
-            command='python',
-            args=[self.server_path],
-        )
-        # 改成用异步上下文堆栈来处理
-        read_stream, write_stream = await self.exit_stack.enter_async_context(stdio_client(server=server_parameters))
-        session = await self.exit_stack.enter_async_context(
-            ClientSession(read_stream=read_stream, write_stream=write_stream))
+        # 从进程池租用已初始化的会话，省去每次启动解释器和 initialize 握手
+        async with self.pool.lease() as session:
+            await self.process(session, query)
 
-        # 4. 初始化请求
-        await session.initialize()
+    async def process(self, session: ClientSession, query: str):
         # 5. 获取服务端的所有tools
         response = await session.list_tools()
         print(response)
@@ -60,14 +54,14 @@ class MCPClient:
         messages = [
             {
                 "role": "system",
-                "content": "你有能力通过工具 get_weather 查询任意城市的天气信息。遇到天气相关问题时请优先调用工具，不要直接回复。city 参数为拼音。"
+                "content": "你有能力通过工具 get_weather 查询任意城市的天气信息，查询多个城市时使用 get_weather_batch 一次完成。遇到天气相关问题时请优先调用工具，不要直接回复。城市参数为拼音。"
             },
             {
                 "role": "user",
                 "content": query
             }
         ]
-        openai_response = self.openai.chat.completions.create(
+        openai_response = await self.llm.chat(
             messages=messages,
             model="gpt-4o",
             tools=tools
@@ -96,7 +90,7 @@ class MCPClient:
                     "tool_call_id": tool_call_id
                 })
             # 重新把数据发给LLM，让LLM给出最终响应
-            response = self.openai.chat.completions.create(
+            response = await self.llm.chat(
                 model="gpt-4o",
                 messages=messages
             )
@@ -106,7 +100,7 @@ class MCPClient:
             print('回复错误')
 
     async def aclose(self):
-        await self.exit_stack.aclose()
+        await self.pool.aclose()
 
 async def main():
     client = MCPClient('./weather_search_server.py')
@@ -114,6 +108,7 @@ async def main():
         await client.run('查询成都的天气')
     finally:
         await client.aclose()
+        await close_gateway()
 
 if __name__ == '__main__':
     asyncio.run(main())
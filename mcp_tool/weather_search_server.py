@@ -1,35 +1,123 @@
 # import requests
-from mcp.server.fastmcp import FastMCP
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from mcp.server.fastmcp import FastMCP, Context
 import httpx
-from contextlib import AsyncExitStack
 
-weather_api_key = "0e013475bc8c4876b4823959252708"
-weather_base_url = "http://api.weatherapi.com/v1/current.json"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcp_common.cache import TTLCache
+from mcp_common.metrics import percentile
 
-app = FastMCP()
+# stdio 传输下 stdout 用于 JSON-RPC，日志写到 stderr
+logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-@app.tool()
-async def get_weather(city: str) :
-    '''
-    获取城市当前的天气信息
+weather_api_key = os.getenv("WEATHER_API_KEY", "0e013475bc8c4876b4823959252708")
+weather_base_url = os.getenv("WEATHER_BASE_URL", "http://api.weatherapi.com/v1/current.json")
+
+# 连接池配置，可通过环境变量调整
+max_connections = int(os.getenv("WEATHER_MAX_CONNECTIONS", "100"))
+max_keepalive_connections = int(os.getenv("WEATHER_MAX_KEEPALIVE", "20"))
+keepalive_expiry = float(os.getenv("WEATHER_KEEPALIVE_EXPIRY", "30"))
+request_timeout = float(os.getenv("WEATHER_TIMEOUT", "10"))
+
+# 天气结果缓存：按规范化后的城市名缓存，容量有上限，超出后按 LRU 淘汰
+cache_ttl = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+cache_size = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+weather_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+upstream_latencies: deque[float] = deque(maxlen=1000)  # 最近的上游请求耗时(秒)
+
+# 批量查询时同时请求上游的城市数上限，以及单个城市的超时时间(秒)
+batch_concurrency = int(os.getenv("WEATHER_BATCH_CONCURRENCY", "10"))
+batch_city_timeout = float(os.getenv("WEATHER_BATCH_TIMEOUT", "5"))
+
+
+@dataclass
+class AppContext:
+    http_client: httpx.AsyncClient
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """创建带连接池和 keep-alive 的 httpx 客户端"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(request_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+    )
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    # 服务启动时创建一个共享的客户端，所有请求复用连接，服务关闭时统一释放
+    async with create_http_client() as client:
+        yield AppContext(http_client=client)
+
+
+app = FastMCP(lifespan=app_lifespan)
+
+
+async def fetch_weather(client: httpx.AsyncClient, city: str) -> dict:
+    """
+    请求天气接口
+    :param client: 复用的 httpx 客户端
     :param city: 具体城市，需要拼音
-    :return:
-    '''
+    """
     params = {
         "key": weather_api_key,
         "q": city,
     }
-    exit_stack = AsyncExitStack()
-    client = await exit_stack.enter_async_context(httpx.AsyncClient())
     try:
         response = await client.get(weather_base_url, params=params)
-        print(response.json())
         return response.json()
     except Exception as err:
-        print(f"查询接口异常:{err}")
+        logger.warning(f"查询接口异常:{err}")
         return {"error": f"查询接口异常:{err}"}
 
 
+def normalize_city(city: str) -> str:
+    """规范化城市名作为缓存 key，例如 " ChengDu " 和 "chengdu" 命中同一条缓存"""
+    return " ".join(city.split()).lower()
+
+
+async def cached_weather(client: httpx.AsyncClient, city: str) -> dict:
+    """先查缓存，未命中时请求上游；同一城市的并发未命中只发一次上游请求"""
+    key = normalize_city(city)
+
+    async def load() -> dict:
+        start = time.perf_counter()
+        try:
+            return await fetch_weather(client, key)
+        finally:
+            upstream_latencies.append(time.perf_counter() - start)
+
+    # 错误结果不缓存，下次查询重新请求
+    return await weather_cache.get_or_load(key, load, should_cache=lambda result: "error" not in result)
+
+
+@app.tool()
+async def get_weather(city: str, ctx: Context) :
+    '''
+    获取城市当前的天气信息
+    :param city: 具体城市，需要拼音
+    :param ctx: 上下文对象，无需客户端传递
+    :return:
+    '''
+    client = ctx.request_context.lifespan_context.http_client
+    return await cached_weather(client, city)
+
+
     # with httpx.Client() as client:
     #     try:
     #         response = client.get(weather_base_url, params=params)
@@ -44,5 +132,56 @@ async def get_weather(city: str) :
     # return response.json()   #需要以json的数据格式返回，客服端才可以解析
 
 
+@app.tool()
+async def get_weather_batch(cities: list[str], ctx: Context):
+    '''
+    一次获取多个城市当前的天气信息
+    :param cities: 城市列表，需要拼音
+    :param ctx: 上下文对象，无需客户端传递
+    :return: results 为查询成功的城市，errors 为失败或超时的城市及原因
+    '''
+    client = ctx.request_context.lifespan_context.http_client
+    semaphore = asyncio.Semaphore(batch_concurrency)
+    results = {}
+    errors = {}
+
+    async def query(city: str):
+        await semaphore.acquire()
+        task = asyncio.ensure_future(cached_weather(client, city))
+        # 超时只是不再等待结果，上游请求仍在进行，请求真正结束后才释放名额，同时进行的上游请求不超过上限
+        task.add_done_callback(lambda _: semaphore.release())
+        done, _ = await asyncio.wait({task}, timeout=batch_city_timeout)
+        if not done:
+            errors[city] = f"查询超时({batch_city_timeout}s)"
+            return
+        result = task.result()
+        if "error" in result:
+            errors[city] = result["error"]
+        else:
+            results[city] = result
+
+    # 每个城市独立超时，慢城市不会拖住其他城市，返回部分结果
+    await asyncio.gather(*(query(city) for city in dict.fromkeys(cities)))
+    return {"results": results, "errors": errors}
+
+
+@app.resource(
+    uri="stats://weather",
+    name="weather_stats",
+    description="天气查询缓存命中率、合并请求数以及上游请求耗时",
+    mime_type="application/json",
+)
+def weather_stats() -> str:
+    latencies = sorted(upstream_latencies)
+    upstream = {"count": len(latencies)}
+    if latencies:
+        upstream.update({
+            "avg_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        })
+    return json.dumps({"cache": weather_cache.stats(), "upstream": upstream})
+
+
 if __name__ == "__main__":
     app.run(transport='stdio')